@@ -1,34 +1,187 @@
+from bisect import bisect_right
 from datetime import datetime
+import atexit
 import json
 import os
+import threading
+import time
+
+from serializacion import cargar_json, deserializar_json, guardar_json, serializar_json
 
 class GestionCheckpoint:
-    def __init__(self, ruta_del_archivo="checkpoint.json"):
+    def __init__(self, ruta_del_archivo="checkpoint.json", flush_threshold=10, flush_interval_s=5.0,
+                 wal_max_bytes=1024 * 1024, wal_fsync=False):
         """
         Iniciador del gestor del archivo de checkpoint
         
         Argumentos:
             ruta_del_archivo: ruta del archivo donde se guardan los checkpoints
+            flush_threshold: cantidad de actualizaciones pendientes que fuerzan la escritura en disco
+            flush_interval_s: segundos máximos entre escrituras en disco
+            wal_max_bytes: tamaño del log de escritura anticipada (WAL) a partir del cual se compacta
+            wal_fsync: si es True, se fuerza os.fsync tras cada registro del WAL
         """
         self.ruta_del_archivo = ruta_del_archivo
+        self.ruta_wal = os.path.splitext(ruta_del_archivo)[0] + ".wal"
+        self.flush_threshold = flush_threshold
+        self.flush_interval_s = flush_interval_s
+        self.wal_max_bytes = wal_max_bytes
+        self.wal_fsync = wal_fsync
+        self._wal = None
+        self._wal_danado = False
+        # Protege los ids en memoria: el productor de procesar_datos los consulta desde otro hilo
+        self._lock = threading.Lock()
         self.checkpoint = self.cargar_checkpoint()
+        self._indexar_ids()
+        # Control de escrituras pendientes
+        self._dirty_count = 0
+        self._last_flush_ts = time.monotonic()
+        # Momento (epoch) de la última actualización; se formatea solo al escribir en disco
+        self._timestamp_epoch = None
+        # Un WAL con líneas ilegibles se compacta de inmediato: los registros que se agregaran
+        # después quedarían detrás de (o pegados a) la línea dañada
+        if self._wal_danado:
+            self.guardar_checkpoint()
+            self._wal_danado = False
+        atexit.register(self.flush)
     
     def cargar_checkpoint(self):
         """
-        Cargar el archivo checkpoint si es que existe 
+        Cargar el archivo checkpoint si es que existe y reaplicar el WAL pendiente
         """
         if os.path.exists(self.ruta_del_archivo):
             try: 
-                with open(self.ruta_del_archivo, "r") as archivo:
-                    return json.load(archivo)
+                checkpoint = cargar_json(self.ruta_del_archivo)
             except json.JSONDecodeError:
                 print("Error al cargar el archivo de checkpoint")
-                return self.crear_checkpoint()
+                checkpoint = self.crear_checkpoint()
             except Exception as e:
                 print(f"Error: {e}")
-                return self.crear_checkpoint()
+                checkpoint = self.crear_checkpoint()
         else:
-            return self.crear_checkpoint()
+            checkpoint = self.crear_checkpoint()
+        self._reaplicar_wal(checkpoint)
+        return checkpoint
+    
+    def _reaplicar_wal(self, checkpoint):
+        """
+        Reaplica sobre el checkpoint los registros del WAL escritos después del último snapshot.
+        Las líneas ilegibles (escrituras interrumpidas) se omiten y se marca el WAL como dañado.
+        total_procesados se incrementa con los ids que resultan nuevos al reaplicar
+        """
+        if not os.path.exists(self.ruta_wal):
+            return
+        ids = checkpoint.setdefault("ids_procesados", [])
+        vistos = set(ids)
+        nuevos = 0
+        with open(self.ruta_wal, "r", encoding="utf-8") as archivo:
+            for linea in archivo:
+                try:
+                    registro = deserializar_json(linea)
+                except json.JSONDecodeError:
+                    # Escritura interrumpida: se omite la línea y se siguen leyendo las posteriores
+                    self._wal_danado = True
+                    continue
+                if "ids" in registro:
+                    for id_str in registro["ids"]:
+                        if id_str not in vistos:
+                            vistos.add(id_str)
+                            ids.append(id_str)
+                            nuevos += 1
+                    if registro["ids"]:
+                        checkpoint["ultimo_id_procesado"] = registro["ids"][-1]
+                elif "id" in registro:
+                    if registro["id"] not in vistos:
+                        vistos.add(registro["id"])
+                        ids.append(registro["id"])
+                        nuevos += 1
+                    checkpoint["ultimo_id_procesado"] = registro["id"]
+                else:
+                    checkpoint.update(registro)
+                    # El total persistido ya incluye los ids reaplicados hasta este registro
+                    if "total_procesados" in registro:
+                        nuevos = 0
+        checkpoint["total_procesados"] = checkpoint.get("total_procesados", 0) + nuevos
+    
+    @staticmethod
+    def _id_numerico(id_str):
+        """
+        Devuelve el id como entero si tiene forma canónica (solo dígitos ASCII, sin ceros
+        a la izquierda), o None
+        """
+        if id_str.isascii() and id_str.isdigit() and (id_str == "0" or id_str[0] != "0"):
+            return int(id_str)
+        return None
+    
+    def _indexar_ids(self):
+        """
+        Construye las estructuras en memoria de los ids procesados.
+        
+        Los ids enteros se guardan como rangos contiguos ordenados [inicio, fin] en
+        "rangos_procesados" (búsqueda binaria sobre los inicios); el resto de ids se
+        mantiene en "ids_procesados" y en un conjunto para consultas O(1).
+        Los checkpoints antiguos, con todos los ids en la lista, se convierten al cargar.
+        """
+        rangos = [list(r) for r in self.checkpoint.get("rangos_procesados", [])]
+        rangos.sort()
+        self.checkpoint["rangos_procesados"] = rangos
+        self._inicios = [r[0] for r in rangos]
+        
+        otros = []
+        self._ids_set = set()
+        for id_str in self.checkpoint.get("ids_procesados", []):
+            numero = self._id_numerico(id_str)
+            if numero is not None:
+                self._agregar_a_rangos(numero)
+            elif id_str not in self._ids_set:
+                self._ids_set.add(id_str)
+                otros.append(id_str)
+        self.checkpoint["ids_procesados"] = otros
+    
+    def _en_rangos(self, numero):
+        i = bisect_right(self._inicios, numero) - 1
+        return i >= 0 and self.checkpoint["rangos_procesados"][i][1] >= numero
+    
+    def _agregar_a_rangos(self, numero):
+        """
+        Inserta un entero en los rangos fusionándolo con los adyacentes.
+        Devuelve False si ya estaba incluido.
+        """
+        rangos = self.checkpoint["rangos_procesados"]
+        i = bisect_right(self._inicios, numero) - 1
+        if i >= 0 and rangos[i][1] >= numero:
+            return False
+        une_izquierda = i >= 0 and rangos[i][1] == numero - 1
+        une_derecha = i + 1 < len(rangos) and rangos[i + 1][0] == numero + 1
+        if une_izquierda and une_derecha:
+            rangos[i][1] = rangos[i + 1][1]
+            del rangos[i + 1]
+            del self._inicios[i + 1]
+        elif une_izquierda:
+            rangos[i][1] = numero
+        elif une_derecha:
+            rangos[i + 1][0] = numero
+            self._inicios[i + 1] = numero
+        else:
+            rangos.insert(i + 1, [numero, numero])
+            self._inicios.insert(i + 1, numero)
+        return True
+    
+    def _escribir_wal(self, *registros):
+        """
+        Agrega registros al final del WAL (una línea JSON por registro) en una sola escritura
+        """
+        if self._wal is None:
+            self._wal = open(self.ruta_wal, "a", encoding="utf-8", buffering=1)
+        self._wal.write("".join(serializar_json(registro) + "\n" for registro in registros))
+        if self.wal_fsync:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+    
+    def _cerrar_wal(self):
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
     
     def crear_checkpoint(self):
         """
@@ -37,25 +190,72 @@ class GestionCheckpoint:
         return {
             "ultimo_id_procesado": None,
             "ids_procesados": [],
+            "rangos_procesados": [],
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "total_procesados": 0
         }
     
     def guardar_checkpoint(self):
         """
-        Guarda el checkpoint en un archivo json
+        Guarda el checkpoint completo en un archivo json y vacía el WAL.
+        La escritura es atómica: se escribe un archivo temporal y se reemplaza el original.
+        """
+        self._renderizar_timestamp()
+        ruta_tmp = self.ruta_del_archivo + ".tmp"
+        # El temporal se sincroniza antes del reemplazo para no dejar un checkpoint vacío tras un corte
+        guardar_json(self.checkpoint, ruta_tmp, sincronizar=True)
+        os.replace(ruta_tmp, self.ruta_del_archivo)
+        # El snapshot ya contiene todo lo registrado en el WAL
+        self._cerrar_wal()
+        if os.path.exists(self.ruta_wal):
+            os.remove(self.ruta_wal)
+        self._dirty_count = 0
+        self._last_flush_ts = time.monotonic()
+    
+    def _renderizar_timestamp(self):
+        """
+        Convierte a texto el momento de la última actualización pendiente
+        """
+        if self._timestamp_epoch is not None:
+            self.checkpoint["timestamp"] = datetime.fromtimestamp(self._timestamp_epoch).strftime("%Y-%m-%d %H:%M:%S")
+            self._timestamp_epoch = None
+    
+    def compactar(self):
+        """
+        Reescribe el snapshot y vacía el WAL cuando este supera wal_max_bytes
         """
-        with open(self.ruta_del_archivo, "w") as archivo:
-            json.dump(self.checkpoint, archivo, indent=4)
+        if os.path.exists(self.ruta_wal) and os.path.getsize(self.ruta_wal) >= self.wal_max_bytes:
+            self.guardar_checkpoint()
+    
+    def flush(self):
+        """
+        Persiste los cambios pendientes como un registro del WAL, compactando si hace falta
+        """
+        if self._dirty_count > 0:
+            self._renderizar_timestamp()
+            self._escribir_wal({
+                "ultimo_id_procesado": self.checkpoint["ultimo_id_procesado"],
+                "total_procesados": self.checkpoint["total_procesados"],
+                "timestamp": self.checkpoint["timestamp"]
+            })
+            self._dirty_count = 0
+            self._last_flush_ts = time.monotonic()
+            self.compactar()
     
     def actualizar_checkpoint(self, ultimo_id_procesado, total_procesados):
         """
-        Actualiza el checkpoint con el último id procesado y el total de registros procesados
+        Actualiza el checkpoint con el último id procesado y el total de registros procesados.
+        La escritura en disco se agrupa: solo se realiza al alcanzar flush_threshold
+        actualizaciones pendientes o al superar flush_interval_s desde la última escritura.
         """
         self.checkpoint["ultimo_id_procesado"] = ultimo_id_procesado
         self.checkpoint["total_procesados"] = total_procesados
-        self.checkpoint["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.guardar_checkpoint()
+        # El timestamp en texto se genera al persistir, no en cada actualización
+        self._timestamp_epoch = time.time()
+        self._dirty_count += 1
+        if (self._dirty_count >= self.flush_threshold
+                or time.monotonic() - self._last_flush_ts >= self.flush_interval_s):
+            self.flush()
     
     def obtener_ultimo_id_procesado(self):
         """
@@ -72,8 +272,54 @@ class GestionCheckpoint:
     def obtener_ids_procesados(self):
         """
         Obtiene los ids de los registros procesados del checkpoint
+        (los rangos se expanden, por lo que es O(total de ids))
+        """
+        ids = [str(n) for inicio, fin in self.checkpoint["rangos_procesados"]
+               for n in range(inicio, fin + 1)]
+        return ids + self.checkpoint.get("ids_procesados", [])
+    
+    def registrar_verificacion_modelo(self, modelo):
+        """
+        Registra que el modelo respondió correctamente a la prueba de conexión.
+        Se guarda en el WAL, sin reescribir el checkpoint completo
+        """
+        registro = {"verificacion_modelo": {"modelo": modelo, "ts": time.time()}}
+        self.checkpoint.update(registro)
+        self._escribir_wal(registro)
+    
+    def obtener_verificacion_modelo(self, modelo):
         """
-        return self.checkpoint.get("ids_procesados", [])
+        Obtiene el momento (epoch) de la última verificación correcta del modelo, o None
+        """
+        verificacion = self.checkpoint.get("verificacion_modelo") or {}
+        if verificacion.get("modelo") != modelo:
+            return None
+        return verificacion.get("ts")
+    
+    def obtener_rangos_procesados(self):
+        """
+        Obtiene los rangos [inicio, fin] ordenados de ids enteros procesados
+        (para filtrar ids de forma vectorizada sin expandirlos)
+        """
+        return self.checkpoint["rangos_procesados"]
+    
+    def obtener_ids_no_numericos(self):
+        """
+        Obtiene el conjunto (de solo lectura) de ids procesados que no se guardan como
+        rangos, para comprobarlos en bloque con Series.isin
+        """
+        return self._ids_set
+    
+    def obtener_copia_procesados(self):
+        """
+        Obtiene una copia inmutable de los rangos y de los ids no numéricos, tomada bajo
+        el lock, para consultarlos desde otro hilo mientras se agregan ids
+        
+        Returns:
+            tuple: (rangos como tupla de pares (inicio, fin), frozenset de ids no numéricos)
+        """
+        with self._lock:
+            return tuple(map(tuple, self.checkpoint["rangos_procesados"])), frozenset(self._ids_set)
     
     def obtener_info(self, clave=None):
         """
@@ -91,7 +337,8 @@ class GestionCheckpoint:
     
     def agregar_id_procesado(self, id_elemento):
         """
-        Agrega un id a la lista de procesados sin guardar el checkpoint
+        Agrega un id a la lista de procesados y lo registra en el WAL,
+        sin reescribir el checkpoint completo
         
         Args:
             id_elemento: ID del elemento a agregar 
@@ -99,17 +346,48 @@ class GestionCheckpoint:
         Returns:
             True si se agregó el id, False si ya existía
         """
-        if "ids_procesados" not in self.checkpoint:
-            self.checkpoint["ids_procesados"] = []
-            
         id_str = str(id_elemento)
-        if id_str not in self.checkpoint["ids_procesados"]:
-            self.checkpoint["ids_procesados"].append(id_str)
+        with self._lock:
+            nuevo = self._registrar_id(id_str)
+        if nuevo:
             self.checkpoint["ultimo_id_procesado"] = id_str
+            self._escribir_wal({"id": id_str, "ts": time.time()})
             return True
         else:
             return False
     
+    def agregar_ids_procesados(self, ids_elementos):
+        """
+        Agrega un lote de ids procesados: los nuevos se registran en el WAL en un único
+        registro {"ids": [...]} y se suman a total_procesados
+        
+        Args:
+            ids_elementos: IDs de los elementos a agregar, en orden de procesamiento
+            
+        Returns:
+            Cantidad de ids que no estaban registrados
+        """
+        with self._lock:
+            nuevos = [id_str for id_str in map(str, ids_elementos) if self._registrar_id(id_str)]
+        
+        if nuevos:
+            self._escribir_wal({"ids": nuevos, "ts": time.time()})
+            self.actualizar_checkpoint(nuevos[-1], self.checkpoint["total_procesados"] + len(nuevos))
+        return len(nuevos)
+    
+    def _registrar_id(self, id_str):
+        """
+        Agrega el id a los rangos o al conjunto en memoria. Devuelve False si ya existía.
+        """
+        numero = self._id_numerico(id_str)
+        if numero is not None:
+            return self._agregar_a_rangos(numero)
+        if id_str in self._ids_set:
+            return False
+        self._ids_set.add(id_str)
+        self.checkpoint["ids_procesados"].append(id_str)
+        return True
+    
     def es_procesado(self, id_elemento):
         """
         Verifica si el id ya había sido procesado
@@ -120,12 +398,65 @@ class GestionCheckpoint:
         Returns:
             True si el id ya había sido procesado, False en caso contrario
         """
-        return str(id_elemento) in self.checkpoint.get("ids_procesados", [])
+        id_str = str(id_elemento)
+        numero = self._id_numerico(id_str)
+        with self._lock:
+            if numero is not None:
+                return self._en_rangos(numero)
+            return id_str in self._ids_set
+    
+    # Permite usar el gestor como contenedor: `id in checkpoint`
+    __contains__ = es_procesado
     
     def reiniciar(self):
         """
         Reinicia el checkpoint al estado inicial
         """
-        self.checkpoint = self.crear_checkpoint()
+        with self._lock:
+            self.checkpoint = self.crear_checkpoint()
+            self._indexar_ids()
+        self.guardar_checkpoint()
+        return True
+    
+    # --- API de compatibilidad con el antiguo CheckpointManager ---
+    load_checkpoint = cargar_checkpoint
+    default_checkpoint = crear_checkpoint
+    save_checkpoint = guardar_checkpoint
+    reset_checkpoint = reiniciar
+    
+    @property
+    def path(self):
+        return self.ruta_del_archivo
+    
+    def add_id(self, id_procesado):
+        """
+        Agrega un id procesado e incrementa el total si es nuevo
+        """
+        if self.agregar_id_procesado(id_procesado):
+            self.checkpoint["total_procesados"] += 1
+            self._dirty_count += 1
+    
+    def update_checkpoint(self, ultimo_id, ids_procesados=None):
+        """
+        Actualiza el último id procesado. Si se proporciona ids_procesados,
+        reemplaza la lista completa de ids y guarda el checkpoint
+        """
+        if ids_procesados is None:
+            self.actualizar_checkpoint(ultimo_id, self.checkpoint["total_procesados"])
+            return
+        with self._lock:
+            self.checkpoint["ids_procesados"] = [str(id_procesado) for id_procesado in ids_procesados]
+            self.checkpoint["rangos_procesados"] = []
+            self._indexar_ids()
+        self.checkpoint["ultimo_id_procesado"] = ultimo_id
+        self.checkpoint["total_procesados"] = len(ids_procesados)
+        self._timestamp_epoch = time.time()
         self.guardar_checkpoint()
-        return True
\ No newline at end of file
+    
+    def __del__(self):
+        # Red de seguridad: no perder actualizaciones pendientes
+        try:
+            self.flush()
+            self._cerrar_wal()
+        except Exception:
+            pass
\ No newline at end of file
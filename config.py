@@ -3,5 +3,17 @@ CONFIG = {
     
     "batch_size": 32,  # Cantidad de datos a procesar por ejecucion python  cambiar batch_size 1 para evitar errores de memoria
     "ruta_checkpoint": "checkpoint.json",  
+    "ruta_cache": "verificacion_cache.json",  # Resultados ya verificados por relación
+    "reporte_indentado": False,  # Si los reportes JSON se escriben indentados (más legibles, más lentos de generar)
+    "relaciones_no_permitidas": [],  # Tipos de relación que se marcan como inválidos sin consultar al modelo
+    "intervalo_cache_s": 10.0,  # Segundos mínimos entre guardados de la caché durante el procesamiento
     "max_procesar": 5,  # Límite de textos por ejecución (opcional)
+    "hosts": ["http://localhost:11434"],  # Servidores de Ollama; las peticiones se reparten entre ellos
+    "concurrencia": 8,  # Peticiones simultáneas a cada servidor de Ollama dentro de cada lote
+    "micro_batch": 8,  # Relaciones evaluadas en un mismo prompt (1 = una por petición)
+    "keep_alive": "30m",  # Tiempo que Ollama mantiene el modelo cargado entre peticiones
+    "temperatura": 0.1,  # Temperatura de muestreo del modelo
+    "timeout_lectura_s": 300,  # Segundos máximos sin recibir datos de Ollama antes de dar la petición por fallida
+    "max_reintentos": 3,  # Reintentos cuando Ollama responde saturado (429/503), con espera exponencial
+    "num_predict": None,  # Máximo de tokens generados por relación (None = sin límite; los modelos de razonamiento necesitan margen)
 }  
\ No newline at end of file
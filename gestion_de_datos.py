@@ -1,10 +1,31 @@
 import pandas as pd
 import json
+import mmap
 import os
 import re
-from typing import List, Union, Optional, Iterable
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import List, Union, Optional, Iterable, Container
 import logging
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow es opcional; si no está se usa el lector de pandas
+    pa = None
+
+try:
+    import simdjson
+    _JSON_PARSER = simdjson.Parser()
+except ImportError:  # pysimdjson es opcional; si no está se usa json
+    simdjson = None
+
+try:
+    import ijson
+except ImportError:  # ijson es opcional; sin él el JSON se carga completo
+    ijson = None
+
 # Configuración del logging
 logging.basicConfig(
     level=logging.INFO, 
@@ -13,12 +34,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Expresiones regulares del parseo de entradas, compiladas una sola vez
+# Formato extendido con paréntesis anidados
+_RE_INITIAL = re.compile(r"^(\d+):\s*\((.*)\)\s*([\d.]+)(?:,)?$")
+_RE_CODE1 = re.compile(r"^\s*(\d+)\s*\(([^)]+(?:\([^)]*\)[^)]*)*)\)\s*,")
+_RE_RELATION = re.compile(r"^([^,]+)\s*,\s*(\d+)\s*\(([^)]+(?:\([^)]*\)[^)]*)*)\)\s*$")
+# Formato extendido estándar
+_RE_EXT = re.compile(r"^(\d+):\s*\(\s*(\d+)\s*\(([^)]+)\)\s*,\s*([^,]+)\s*,\s*(\d+)\s*\(([^)]+)\)\s*\)\s*([\d.]+)(?:,)?$")
+# Formato original (4 campos)
+_RE_ORIG = re.compile(r"^(\d+):\s*\((.*)\)$", re.DOTALL)
+
+# Columnas resultantes del parseo según el formato
+_COLUMNS_EXT = ['Linea', 'Codigo1', 'Entidad', 'Relación', 'Codigo2', 'ElementoRelacionado', 'Score']
+_COLUMNS_ORIG = ['ID', 'Entidad', 'Relación', 'Elemento Relacionado']
+_EMPTY_ENTRY = (None,) * 7
+# Columnas con muchos valores repetidos que se guardan como categorías
+_CATEGORY_COLUMNS = ('Entidad', 'Relación')
+
+# Tamaño aproximado (en bytes) de cada bloque de líneas enviado a los procesos de parseo
+_TXT_BLOCK_BYTES = 8 * 1024 * 1024
+
 class DataLoader:
+    # Columnas que deben tener valor para que una fila no se considere basura.
+    # Si es None se descartan las filas con cualquier valor nulo.
+    key_columns: Optional[List[str]] = None
+
     def __init__(self, 
                  file_path: str, 
                  chunk_size: int = 10000, 
                  has_header: bool = True, 
-                 custom_headers: Optional[List[str]] = None):
+                 custom_headers: Optional[List[str]] = None,
+                 n_workers: int = 1,
+                 processed_ids: Optional[Container[str]] = None):
         """
         Inicializa el DataLoader con la ruta del archivo, tamaño de chunk,
         y la opción de definir encabezados personalizados.
@@ -28,26 +75,90 @@ class DataLoader:
             chunk_size (int): Tamaño de los chunks para lectura de archivos grandes.
             has_header (bool): Indica si el archivo contiene encabezados.
             custom_headers (list, opcional): Lista de encabezados a asignar si no existen.
+            n_workers (int): Procesos para parsear archivos TXT en paralelo (1 = secuencial).
+            processed_ids (opcional): IDs ya procesados (un set o el propio GestionCheckpoint);
+                las líneas TXT con esos IDs se descartan antes de parsearlas.
         """
         self.file_path = file_path
         self.chunk_size = chunk_size
         self.has_header = has_header
         self.custom_headers = custom_headers
+        self.n_workers = n_workers
+        self.processed_ids = processed_ids
+        # Líneas TXT descartadas en la última lectura por estar ya procesadas
+        self.skipped_processed = 0
         
         if not os.path.exists(file_path):
             logger.error(f"El archivo {file_path} no existe.")
             raise FileNotFoundError(f"No se encontró el archivo: {file_path}")
         
-        # Cargar la estructura solo si el archivo es JSON
-        file_ext = os.path.splitext(file_path)[1].lower()
-        if file_ext == '.json':
-            self.data_structure = self.load_data_structure()
-        else:
-            self.data_structure = {}
+        # La extensión y el lector correspondiente se resuelven una sola vez
+        self._ext = os.path.splitext(file_path)[1].lower()
+        self._reader_fn = {
+            '.csv': self._load_csv,
+            '.xlsx': self._load_excel,
+            '.xls': self._load_excel,
+            '.txt': self._load_txt,
+        }.get(self._ext)
+        
+        # La estructura JSON se carga la primera vez que se accede a data_structure
+        self._data_structure = None
             
         logger.info(f"Inicializando DataLoader para el archivo: {os.path.basename(file_path)}")
         logger.info(f"Ruta completa: {file_path}")
 
+    @property
+    def data_structure(self) -> dict:
+        """
+        Estructura completa del archivo JSON (vacía para otros formatos).
+        Se carga en el primer acceso; para archivos grandes es preferible
+        recorrerla con iter_data_structure o iter_top_level_items.
+        """
+        if self._data_structure is None:
+            self._data_structure = self.load_data_structure() if self._ext == '.json' else {}
+        return self._data_structure
+
+    def iter_data_structure(self, prefix: str = "item") -> Iterable:
+        """
+        Recorre los objetos del archivo JSON que cuelgan de `prefix` sin cargar
+        el archivo completo en memoria (con ijson). Por defecto, los elementos
+        de una lista en la raíz.
+        
+        Args:
+            prefix (str): Ruta de ijson de los objetos a recorrer.
+        
+        Yields:
+            Cada objeto encontrado en la ruta indicada.
+        """
+        if ijson is not None:
+            with open(self.file_path, 'rb') as f:
+                yield from ijson.items(f, prefix, use_float=True)
+            return
+        # Sin ijson se recorre la estructura cargada completa siguiendo el prefijo
+        nodes = [self.data_structure]
+        for key in prefix.split('.') if prefix else ():
+            if key == 'item':
+                nodes = [element for node in nodes if isinstance(node, list) for element in node]
+            else:
+                nodes = [node[key] for node in nodes if isinstance(node, dict) and key in node]
+        yield from nodes
+
+    def iter_top_level_items(self) -> Iterable[tuple]:
+        """
+        Recorre las claves de primer nivel del archivo JSON de una en una, de modo
+        que cada valor puede descartarse después de usarlo.
+        
+        Yields:
+            tuple: (clave, valor).
+        """
+        if ijson is not None:
+            with open(self.file_path, 'rb') as f:
+                yield from ijson.kvitems(f, "", use_float=True)
+            return
+        data = self.data_structure
+        if isinstance(data, dict):
+            yield from data.items()
+
     def load_data_structure(self) -> dict:
         """
         Carga la estructura de datos desde un archivo JSON.
@@ -56,6 +167,11 @@ class DataLoader:
             dict: Estructura de datos cargada.
         """
         try:
+            if simdjson is not None:
+                with open(self.file_path, 'rb') as f:
+                    # recursive=True devuelve objetos de Python en lugar de proxies
+                    # ligados al buffer del parser, que se reutiliza
+                    return _JSON_PARSER.parse(f.read(), recursive=True)
             with open(self.file_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
@@ -78,130 +194,360 @@ class DataLoader:
         Returns:
             DataFrame o generador de chunks procesados.
         """
-        file_extension = os.path.splitext(self.file_path)[1].lower()
-        
         try:
-            if file_extension == '.csv':
-                reader = pd.read_csv
-                if not self.has_header:
-                    full_df = reader(self.file_path, header=None)
-                    if self.custom_headers is not None:
-                        full_df.columns = self.custom_headers
-                else:
-                    full_df = reader(self.file_path)
-            
-            elif file_extension in ('.xlsx', '.xls'):
-                reader = pd.read_excel
-                if not self.has_header:
-                    full_df = reader(self.file_path, sheet_name=sheet_name, header=None)
-                    if self.custom_headers is not None:
-                        full_df.columns = self.custom_headers
-                else:
-                    full_df = reader(self.file_path, sheet_name=sheet_name)
-            
-            elif file_extension == '.txt':
-                full_df_or_generator = self._process_txt_file(remove_garbage)
-                # Si se obtiene un DataFrame (archivo pequeño) podemos asignar encabezados personalizados
-                if isinstance(full_df_or_generator, pd.DataFrame):
-                    # Si se requieren encabezados personalizados, se validan las columnas extraídas
-                    if not self.has_header and self.custom_headers is not None:
-                        if len(self.custom_headers) == full_df_or_generator.shape[1]:
-                            full_df_or_generator.columns = self.custom_headers
-                        else:
-                            logger.warning(f"Encabezados personalizados ({len(self.custom_headers)}) no coinciden con "
-                                           f"el número de columnas extraídas ({full_df_or_generator.shape[1]})")
-                    processed_df = self._process_dataframe(full_df_or_generator, columns_to_keep, remove_garbage)
-                    logger.info(f"Filas después del procesamiento: {processed_df.shape[0]}")
-                    logger.info(f"Columnas después del procesamiento: {processed_df.shape[1]}")
-                    return processed_df
-                else:
-                    # Se devuelve el generador de chunks para archivos TXT grandes
-                    return full_df_or_generator
-            else:
-                raise ValueError(f"Formato de archivo no soportado: {file_extension}")
-            
-            # Para CSV y Excel, si el DataFrame es pequeño se procesa completo
-            if self.chunk_size > len(full_df):
-                processed_df = self._process_dataframe(full_df, columns_to_keep, remove_garbage)
-                logger.info(f"Filas después del procesamiento: {processed_df.shape[0]}")
-                logger.info(f"Columnas después del procesamiento: {processed_df.shape[1]}")
-                return processed_df
-            
-            # Para archivos CSV se habilita la lectura por chunks
-            if file_extension == '.csv':
-                logger.info("Modo de lectura por chunks activado")
-                chunk_iter = reader(self.file_path, chunksize=self.chunk_size)
-                return self._process_chunks(chunk_iter, columns_to_keep, remove_garbage)
-            else:
-                processed_df = self._process_dataframe(full_df, columns_to_keep, remove_garbage)
-                logger.info(f"Filas después del procesamiento: {processed_df.shape[0]}")
-                logger.info(f"Columnas después del procesamiento: {processed_df.shape[1]}")
-                return processed_df
-            
+            if self._reader_fn is None:
+                raise ValueError(f"Formato de archivo no soportado: {self._ext}")
+            return self._reader_fn(columns_to_keep, remove_garbage, sheet_name)
         except Exception as e:
             logger.error(f"Error al cargar el archivo: {e}")
             return pd.DataFrame()
 
-    def _process_txt_file(self, remove_garbage: bool = False) -> Union[pd.DataFrame, Iterable[pd.DataFrame]]:
+    def _load_csv(self,
+                  columns_to_keep: Optional[List[str]],
+                  remove_garbage: bool,
+                  sheet_name: Optional[str] = None
+                  ) -> Union[pd.DataFrame, Iterable[pd.DataFrame]]:
+        # Las columnas a mantener se pasan al lector (solo posible si hay encabezados)
+        usecols = columns_to_keep if self.has_header else None
+        full_df = self._read_csv(usecols)
+        if not self.has_header and self.custom_headers is not None:
+            full_df.columns = self.custom_headers
+        
+        # Si el DataFrame es pequeño se procesa completo
+        if self.chunk_size > len(full_df):
+            return self._process_full_dataframe(full_df, columns_to_keep, remove_garbage)
+        
+        # Para archivos CSV grandes se habilita la lectura por chunks
+        logger.info("Modo de lectura por chunks activado")
+        chunk_iter = self._read_csv_chunks(usecols)
+        return self._process_chunks(chunk_iter, columns_to_keep, remove_garbage)
+
+    def _load_excel(self,
+                    columns_to_keep: Optional[List[str]],
+                    remove_garbage: bool,
+                    sheet_name: Optional[str] = None
+                    ) -> pd.DataFrame:
+        if not self.has_header:
+            full_df = pd.read_excel(self.file_path, sheet_name=sheet_name, header=None)
+            if self.custom_headers is not None:
+                full_df.columns = self.custom_headers
+        else:
+            full_df = pd.read_excel(self.file_path, sheet_name=sheet_name, usecols=columns_to_keep)
+        return self._process_full_dataframe(full_df, columns_to_keep, remove_garbage)
+
+    def _load_txt(self,
+                  columns_to_keep: Optional[List[str]],
+                  remove_garbage: bool,
+                  sheet_name: Optional[str] = None
+                  ) -> Union[pd.DataFrame, Iterable[pd.DataFrame]]:
+        txt_chunks = self._process_txt_file(remove_garbage)
+        first_chunk = next(txt_chunks, None)
+        if first_chunk is None:
+            # Al reanudar, todas las líneas pueden estar ya en el checkpoint: no es un error
+            if self.skipped_processed:
+                logger.info("Las %d líneas del archivo TXT ya están procesadas", self.skipped_processed)
+            else:
+                logger.error("No se pudo procesar ninguna línea del archivo TXT")
+            return pd.DataFrame()
+        
+        # Si el primer chunk no se llenó, el archivo es pequeño y se devuelve un DataFrame
+        if len(first_chunk) < self.chunk_size:
+            # Se agota el generador para que registre el resumen de líneas problemáticas
+            next(txt_chunks, None)
+            # Si se requieren encabezados personalizados, se validan las columnas extraídas
+            if not self.has_header and self.custom_headers is not None:
+                if len(self.custom_headers) == first_chunk.shape[1]:
+                    first_chunk.columns = self.custom_headers
+                else:
+                    logger.warning(f"Encabezados personalizados ({len(self.custom_headers)}) no coinciden con "
+                                   f"el número de columnas extraídas ({first_chunk.shape[1]})")
+            return self._process_full_dataframe(first_chunk, columns_to_keep, remove_garbage)
+        
+        # Se devuelve el generador de chunks para archivos TXT grandes
+        return self._process_chunks(chain([first_chunk], txt_chunks), columns_to_keep, remove_garbage)
+
+    def _process_full_dataframe(self,
+                                df: pd.DataFrame,
+                                columns_to_keep: Optional[List[str]],
+                                remove_garbage: bool
+                                ) -> pd.DataFrame:
+        processed_df = self._process_dataframe(df, columns_to_keep, remove_garbage)
+        logger.info(f"Filas después del procesamiento: {processed_df.shape[0]}")
+        logger.info(f"Columnas después del procesamiento: {processed_df.shape[1]}")
+        return processed_df
+
+    def _arrow_read_options(self):
+        # block_size está en bytes (estimación de chunk_size filas); los chunks en streaming
+        # se recortan a chunk_size filas en _iter_arrow_chunks.
+        # Sin encabezados se usan los personalizados; si no hay, pyarrow genera f0, f1...
+        # y se renombran a 0, 1... como en pandas (ver _renombrar_sin_encabezado)
+        column_names = self.custom_headers if not self.has_header else None
+        return pa_csv.ReadOptions(block_size=self.chunk_size * 1024,
+                                  column_names=column_names,
+                                  autogenerate_column_names=not self.has_header and column_names is None)
+
+    def _renombrar_sin_encabezado(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self.has_header and self.custom_headers is None:
+            df.columns = range(df.shape[1])
+        return df
+
+    @staticmethod
+    def _arrow_convert_options(usecols: Optional[List[str]]):
+        if usecols:
+            return pa_csv.ConvertOptions(include_columns=usecols)
+        return None
+
+    @staticmethod
+    def _arrow_types_mapper(arrow_type):
+        # Las columnas de texto se mantienen respaldadas por Arrow ("string[pyarrow]"):
+        # almacenamiento contiguo y operaciones .str vectorizadas, sin objetos de Python
+        if arrow_type in (pa.string(), pa.large_string()):
+            return pd.StringDtype("pyarrow")
+        return None
+
+    def _read_csv(self, usecols: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Procesa el archivo TXT línea por línea utilizando _parse_data_entry y retorna
-        o bien un DataFrame completo o un generador de DataFrames en función del tamaño.
+        Lee el CSV completo con el lector multihilo de pyarrow si está disponible;
+        si no está instalado o no puede interpretar el archivo se usa pandas.
         
         Args:
-            remove_garbage (bool): Si se deben reportar líneas mal formateadas.
+            usecols: Columnas a leer; el resto no se parsea.
         
         Returns:
-            DataFrame o generador de DataFrames.
+            DataFrame con el contenido del archivo.
+        """
+        if pa is not None:
+            try:
+                table = pa_csv.read_csv(self.file_path, read_options=self._arrow_read_options(),
+                                        convert_options=self._arrow_convert_options(usecols))
+                df = table.to_pandas(self_destruct=True, types_mapper=self._arrow_types_mapper)
+                return self._renombrar_sin_encabezado(df)
+            except pa.lib.ArrowInvalid as e:
+                logger.warning(f"pyarrow no pudo leer el CSV, se usa pandas: {e}")
+        return pd.read_csv(self.file_path, header='infer' if self.has_header else None, usecols=usecols)
+
+    def _read_csv_chunks(self, usecols: Optional[List[str]] = None) -> Iterable[pd.DataFrame]:
+        """
+        Devuelve un iterador de DataFrames de chunk_size filas sobre el CSV. Con
+        pyarrow se leen RecordBatches en streaming; si no está disponible, con pandas.
         """
-        data = []
-        problematic_lines = []
+        if pa is not None:
+            try:
+                reader = pa_csv.open_csv(self.file_path, read_options=self._arrow_read_options(),
+                                         convert_options=self._arrow_convert_options(usecols))
+                return self._iter_arrow_chunks(reader, usecols)
+            except pa.lib.ArrowInvalid as e:
+                logger.warning(f"pyarrow no pudo leer el CSV, se usa pandas: {e}")
+        return self._read_csv_chunks_pandas(usecols)
+
+    def _read_csv_chunks_pandas(self, usecols: Optional[List[str]] = None, skip: int = 0):
+        if self.has_header:
+            return pd.read_csv(self.file_path, usecols=usecols, chunksize=self.chunk_size,
+                               skiprows=range(1, skip + 1) if skip else None)
+        return pd.read_csv(self.file_path, header=None, names=self.custom_headers,
+                           chunksize=self.chunk_size, skiprows=skip or None)
+
+    def _iter_arrow_chunks(self, reader, usecols: Optional[List[str]] = None) -> Iterable[pd.DataFrame]:
+        """
+        Agrupa los RecordBatches del lector en chunks de chunk_size filas.
         
+        open_csv infiere los tipos con el primer bloque, por lo que un valor posterior
+        incompatible (p. ej. un id no numérico) produce ArrowInvalid durante la lectura;
+        en ese caso se continúa con pandas desde la primera fila no devuelta.
+        """
+        pending = []
+        n_pending = 0
+        yielded = 0
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                for i, line in enumerate(file, 1):
-                    line = line.strip()
-                    if not line:
-                        continue  # Ignorar líneas vacías
-                    
-                    parsed = self._parse_data_entry(line)
-                    # Verificamos si al menos los dos primeros campos (identificador y primer código) tienen valor
-                    if parsed and parsed[0] is not None and parsed[1] is not None:
-                        data.append(parsed)
-                    else:
-                        problematic_lines.append((i, line))
-                        if remove_garbage:
-                            logger.warning(f"Línea mal formateada ({i}): {line}")
-            
-            if not data:
-                logger.error("No se pudo procesar ninguna línea del archivo TXT")
-                return pd.DataFrame()
-            
-            if problematic_lines:
-                logger.warning(f"Total de líneas problemáticas: {len(problematic_lines)} de un total aproximado de {i} líneas")
+            for batch in reader:
+                pending.append(batch)
+                n_pending += batch.num_rows
+                if n_pending < self.chunk_size:
+                    continue
+                table = pa.Table.from_batches(pending)
+                start = 0
+                while n_pending - start >= self.chunk_size:
+                    yield self._arrow_to_pandas(table.slice(start, self.chunk_size))
+                    start += self.chunk_size
+                    yielded += self.chunk_size
+                pending = table.slice(start).to_batches()
+                n_pending -= start
+        except pa.lib.ArrowInvalid as e:
+            logger.warning("pyarrow no pudo convertir el CSV desde la fila %d, se continúa con pandas: %s",
+                           yielded, e)
+            yield from self._read_csv_chunks_pandas(usecols, skip=yielded)
+            return
+        if n_pending:
+            yield self._arrow_to_pandas(pa.Table.from_batches(pending))
+
+    def _arrow_to_pandas(self, table) -> pd.DataFrame:
+        return self._renombrar_sin_encabezado(table.to_pandas(types_mapper=self._arrow_types_mapper))
+
+    def _process_txt_file(self, remove_garbage: bool = False) -> Iterable[pd.DataFrame]:
+        """
+        Lee el archivo TXT línea por línea utilizando _parse_data_entry y genera
+        DataFrames (sin procesar) de hasta chunk_size filas a medida que se leen,
+        de modo que en memoria solo se mantiene un chunk a la vez.
+        
+        Args:
+            remove_garbage (bool): Si se deben reportar líneas mal formateadas.
+        
+        Yields:
+            DataFrames con las filas parseadas.
+        """
+        buffer = []
+        columns = None
+        problematic_count = 0
+        i = 0
+        # Se evalúa una vez: el aviso por línea solo se emite si el nivel lo permite
+        warn_lines = remove_garbage and logger.isEnabledFor(logging.WARNING)
+        # Tipos categóricos compartidos entre chunks (las categorías solo crecen)
+        category_dtypes = {}
+        
+        try:
+            for i, line, parsed in self._iter_parsed_lines():
+                # Verificamos si al menos los dos primeros campos (identificador y primer código) tienen valor
+                if not (parsed and parsed[0] is not None and parsed[1] is not None):
+                    problematic_count += 1
+                    if warn_lines:
+                        logger.warning("Línea mal formateada (%d): %s", i, line)
+                    continue
+                
+                # Determinar el número de columnas según el primer registro
+                if columns is None:
+                    # Formato extendido (7 columnas) u original (4 columnas)
+                    columns = _COLUMNS_EXT if len(parsed) == 7 else _COLUMNS_ORIG
+                
+                buffer.append(parsed)
+                if len(buffer) == self.chunk_size:
+                    yield self._to_categorical(pd.DataFrame(buffer, columns=columns), category_dtypes)
+                    buffer = []
+        
+            if buffer:
+                yield self._to_categorical(pd.DataFrame(buffer, columns=columns), category_dtypes)
             
-            # Determinar el número de columnas según el primer registro
-            num_cols = len(data[0])
-            if num_cols == 7:
-                columns = ['Linea', 'Codigo1', 'Entidad', 'Relación', 'Codigo2', 'ElementoRelacionado', 'Score']
-            else:
-                # Formato original (4 columnas)
-                columns = ['ID', 'Entidad', 'Relación', 'Elemento Relacionado']
-            
-            # Si se excede el chunk_size, se retorna un generador de DataFrames
-            if len(data) > self.chunk_size:
-                def generator():
-                    for j in range(0, len(data), self.chunk_size):
-                        chunk = data[j:j+self.chunk_size]
-                        df_chunk = pd.DataFrame(chunk, columns=columns)
-                        yield self._process_dataframe(df_chunk, None, remove_garbage)
-                return generator()
-            else:
-                df = pd.DataFrame(data, columns=columns)
-                return self._process_dataframe(df, None, remove_garbage)
+            if problematic_count:
+                logger.warning("Total de líneas problemáticas: %d de un total aproximado de %d líneas",
+                               problematic_count, i)
             
         except Exception as e:
             logger.error(f"Error al procesar archivo TXT: {e}")
-            return pd.DataFrame()
+
+    @staticmethod
+    def _to_categorical(df: pd.DataFrame, category_dtypes: dict) -> pd.DataFrame:
+        """
+        Convierte las columnas de _CATEGORY_COLUMNS a tipo category, de modo que
+        cada texto repetido se almacena una sola vez.
+        
+        Las categorías solo se amplían al final, por lo que los códigos de los chunks
+        anteriores siguen siendo válidos; pero el dtype de cada chunk puede diferir del
+        de los siguientes. Para concatenar chunks sin perder el tipo category se debe
+        usar union_categoricals o set_categories con el dtype del último chunk.
+        
+        Args:
+            df: Chunk a convertir.
+            category_dtypes: Tipos categóricos de los chunks anteriores; se amplían
+                con los valores nuevos de este chunk.
+        
+        Returns:
+            El mismo DataFrame con las columnas convertidas.
+        """
+        for col in _CATEGORY_COLUMNS:
+            if col not in df.columns:
+                continue
+            values = df[col]
+            dtype = category_dtypes.get(col)
+            if dtype is None:
+                new_categories = values.dropna().unique()
+                categories = list(new_categories)
+            else:
+                new_categories = values[~values.isin(dtype.categories)].dropna().unique()
+                categories = list(dtype.categories) + list(new_categories)
+            if dtype is None or len(new_categories):
+                dtype = pd.CategoricalDtype(categories=categories)
+                category_dtypes[col] = dtype
+            df[col] = values.astype(dtype)
+        return df
+
+    def _iter_parsed_lines(self) -> Iterable[tuple]:
+        """
+        Recorre las líneas no vacías del archivo y las parsea con _parse_data_entry.
+        
+        En modo secuencial el archivo se mapea en memoria (mmap) y se recorre
+        buscando los saltos de línea sobre los bytes; solo se decodifican las
+        líneas que no están vacías.
+        
+        Si se indicó processed_ids, las líneas cuyo ID (el texto antes de ':')
+        ya está procesado se saltan sin aplicar las expresiones regulares; se
+        cuentan en skipped_processed.
+        
+        Con n_workers > 1 el archivo se lee en bloques de líneas completas que se
+        parsean en un pool de procesos; los resultados se devuelven en orden y se
+        mantienen como máximo dos bloques por proceso en vuelo.
+        
+        Yields:
+            tuple: (número de línea, línea, entrada parseada).
+        """
+        self.skipped_processed = 0
+        if self.n_workers <= 1:
+            yield from self._iter_parsed_lines_mmap()
+            return
+        
+        processed_ids = self.processed_ids
+        with open(self.file_path, 'r', encoding='utf-8') as file, \
+                ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            pending = deque()
+            line_number = 0
+            while True:
+                raw_lines = file.readlines(_TXT_BLOCK_BYTES)
+                if raw_lines:
+                    block = []
+                    for line in raw_lines:
+                        line_number += 1
+                        line = line.strip()
+                        if not line:  # Ignorar líneas vacías
+                            continue
+                        if processed_ids is not None and line.partition(':')[0].strip() in processed_ids:
+                            self.skipped_processed += 1
+                            continue
+                        block.append((line_number, line))
+                    future = executor.submit(_parse_block, [line for _, line in block])
+                    pending.append((block, future))
+                
+                while pending and (not raw_lines or len(pending) >= 2 * self.n_workers):
+                    block, future = pending.popleft()
+                    for (i, line), parsed in zip(block, future.result()):
+                        yield i, line, parsed
+                
+                if not raw_lines:
+                    break
+
+    def _iter_parsed_lines_mmap(self) -> Iterable[tuple]:
+        parse_entry = self._parse_data_entry
+        processed_ids = self.processed_ids
+        with open(self.file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return  # mmap no admite archivos vacíos
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                pos = 0
+                i = 0
+                while pos < size:
+                    end = mm.find(b'\n', pos)
+                    if end == -1:
+                        end = size
+                    i += 1
+                    raw = mm[pos:end]
+                    pos = end + 1
+                    if not raw.strip():
+                        continue  # Ignorar líneas vacías sin decodificarlas
+                    line = raw.decode('utf-8').strip()
+                    if not line:
+                        continue
+                    if processed_ids is not None and line.partition(':')[0].strip() in processed_ids:
+                        self.skipped_processed += 1
+                        continue
+                    yield i, line, parse_entry(line)
 
     def _process_chunks(self, 
                         reader: Union[pd.io.parsers.TextFileReader, pd.ExcelFile],
@@ -238,30 +584,85 @@ class DataLoader:
         Returns:
             DataFrame procesado.
         """
-        if columns_to_keep:
+        # Para CSV y Excel con encabezados las columnas ya se filtran al leer
+        if columns_to_keep and list(df.columns) != list(columns_to_keep):
             df = df[columns_to_keep]
         if remove_garbage:
             df = self._remove_garbage_data(df)
         if 'A' in df.columns:
             logger.info("Parseando estructura de datos de la columna 'A'...")
             try:
-                parsed_columns = df['A'].apply(lambda x: pd.Series(self._parse_data_entry(x)))
-                # Se asumen 4 columnas para el parseo de la columna "A"
-                parsed_columns.columns = ['ID', 'Entidad', 'Relación', 'Elemento Relacionado']
+                parsed_columns = self._parse_column(df['A'])
                 df = pd.concat([df, parsed_columns], axis=1)
                 df.drop('A', axis=1, inplace=True, errors='ignore')
             except Exception as e:
                 logger.warning(f"Error al parsear la columna 'A': {e}")
         return df
 
+    def _parse_column(self, column: pd.Series) -> pd.DataFrame:
+        """
+        Versión vectorizada de _parse_data_entry para una columna completa.
+        
+        Los formatos extendido estándar y original se resuelven con str.extract
+        sobre toda la columna; solo las filas con paréntesis anidados (minoría)
+        se parsean fila a fila con _parse_data_entry.
+        
+        Args:
+            column: Serie con las entradas a parsear.
+        
+        Returns:
+            DataFrame con 7 columnas si hay entradas en formato extendido, o con
+            las 4 columnas del formato original en caso contrario. En una columna
+            con ambos formatos, las filas del original ocupan Linea, Entidad,
+            Relación y ElementoRelacionado, y el resto de sus campos queda vacío.
+        """
+        ext = column.str.extract(_RE_EXT)
+        ext.columns = _COLUMNS_EXT
+        orig = column.str.extract(_RE_ORIG)
+        
+        pending = ext['Linea'].isna() & orig[0].isna() & column.notna()
+        nested = column[pending & column.str.match(_RE_INITIAL, na=False)]
+        
+        if ext['Linea'].notna().any() or len(nested):
+            if len(nested):
+                ext.loc[nested.index] = [self._parse_data_entry(entry) for entry in nested]
+            for col in ('Entidad', 'Relación', 'ElementoRelacionado'):
+                ext[col] = ext[col].str.strip()
+            # Filas en formato original dentro de una columna mayoritariamente extendida
+            only_orig = ext['Linea'].isna() & orig[0].notna()
+            if only_orig.any():
+                parsed = self._split_orig(orig[only_orig]).rename(
+                    columns={'ID': 'Linea', 'Elemento Relacionado': 'ElementoRelacionado'})
+                ext = ext.combine_first(parsed)[_COLUMNS_EXT]
+            return ext
+        
+        return self._split_orig(orig)
+
+    @staticmethod
+    def _split_orig(orig: pd.DataFrame) -> pd.DataFrame:
+        """
+        Separa los campos del formato original a partir de los grupos de _RE_ORIG.
+        """
+        content = orig[1].str.split(',', n=2, expand=True).reindex(columns=range(3))
+        parsed = pd.DataFrame({'ID': orig[0]}, index=orig.index)
+        for i, col in enumerate(_COLUMNS_ORIG[1:]):
+            parsed[col] = content[i].str.strip()
+        return parsed
+
     def _remove_garbage_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Limpieza básica de datos basura.
-        Implementación: eliminar filas con valores nulos.
+        Implementación: eliminar filas con valores nulos en key_columns
+        (o en cualquier columna si no se definieron).
         """
+        if self.key_columns:
+            key_columns = [col for col in self.key_columns if col in df.columns]
+            if key_columns:
+                return df.loc[~df[key_columns].isna().any(axis=1)]
         return df.dropna()
 
-    def _parse_data_entry(self, entry: str) -> tuple:
+    @staticmethod
+    def _parse_data_entry(entry: str) -> tuple:
         """
         Parsea cada entrada en un archivo TXT o en la columna "A".
         
@@ -282,46 +683,28 @@ class DataLoader:
             tuple: 7 elementos para los formatos extendidos o 4 para el formato original.
         """
         try:
-            # 1. Intentar con formato extendido con paréntesis anidados
-            initial_match = re.match(r"^(\d+):\s*\((.*)\)\s*([\d.]+)(?:,)?$", entry)
-            if initial_match:
-                linea = initial_match.group(1)
-                inner_content = initial_match.group(2)
-                fuerza_relacion = initial_match.group(3)
+            # Las entradas que terminan en ")" solo pueden estar en el formato original;
+            # las demás terminan con la fuerza de la relación (formatos extendidos).
+            # Así cada línea se resuelve normalmente con una única expresión regular.
+            if not entry.endswith(')'):
+                # 2. Formato extendido estándar (el más frecuente)
+                match_ext = _RE_EXT.match(entry)
+                if match_ext:
+                    return (match_ext.group(1),           # Línea
+                            match_ext.group(2),           # id_farmaco_1
+                            match_ext.group(3).strip(),   # Entidad
+                            match_ext.group(4).strip(),   # Relación
+                            match_ext.group(5),           # id_farmaco_2
+                            match_ext.group(6).strip(),   # Elemento Relacionado
+                            match_ext.group(7))           # fuerza_relacion
                 
-                # Extraer primer código y su texto (se permite anidamiento en el contenido)
-                id_farmaco_1_match = re.match(r"^\s*(\d+)\s*\(([^)]+(?:\([^)]*\)[^)]*)*)\)\s*,", inner_content)
-                if id_farmaco_1_match:
-                    id_farmaco_1 = id_farmaco_1_match.group(1)
-                    entity = id_farmaco_1_match.group(2).strip()
-                    
-                    # Posición después del primer bloque para capturar el resto
-                    pos_after_first = id_farmaco_1_match.end()
-                    remaining = inner_content[pos_after_first:].strip()
-                    
-                    # Extraer la relación y el segundo código con su elemento asociado
-                    relation_match = re.match(r"^([^,]+)\s*,\s*(\d+)\s*\(([^)]+(?:\([^)]*\)[^)]*)*)\)\s*$", remaining)
-                    if relation_match:
-                       relacion = relation_match.group(1).strip()
-                       id_farmaco_2 = relation_match.group(2)
-                       Elemento_Relacionado = relation_match.group(3).strip()
-                       return (linea, id_farmaco_1, entity, relacion, id_farmaco_2, Elemento_Relacionado, fuerza_relacion)
+                # 1. Formato extendido con paréntesis anidados
+                parsed = DataLoader._parse_nested_entry(entry)
+                if parsed is not None:
+                    return parsed
             
-            # 2. Intentar con el formato extendido estándar
-            pattern_ext = r"^(\d+):\s*\(\s*(\d+)\s*\(([^)]+)\)\s*,\s*([^,]+)\s*,\s*(\d+)\s*\(([^)]+)\)\s*\)\s*([\d.]+)(?:,)?$"
-            match_ext = re.match(pattern_ext, entry)
-            if match_ext:
-                return (match_ext.group(1),   # Línea
-                        match_ext.group(2),   # id_farmaco_1
-                        match_ext.group(3),   # Entidad
-                        match_ext.group(4),   # Relación
-                        match_ext.group(5),   # id_farmaco_2
-                        match_ext.group(6),   # Elemento Relacionado
-                        match_ext.group(7))   # fuerza_relacion
-            
-            # 3. Intentar con el formato original (4 campos)
-            pattern_orig = r"^(\d+):\s*\((.*)\)$"
-            match_orig = re.match(pattern_orig, entry, flags=re.DOTALL)
+            # 3. Formato original (4 campos)
+            match_orig = _RE_ORIG.match(entry)
             if match_orig:
                 id_num = match_orig.group(1)
                 content = [elem.strip() for elem in match_orig.group(2).split(',', maxsplit=2)]
@@ -329,12 +712,52 @@ class DataLoader:
                 return (id_num, content[0], content[1], content[2])
             
             # Si ningún patrón coincide, se registra la advertencia
-            logger.warning(f"No se pudo parsear la línea: {entry}")
-            return tuple([None] * 7)
+            logger.warning("No se pudo parsear la línea: %s", entry)
+            return _EMPTY_ENTRY
             
         except Exception as e:
-            logger.warning(f"Error parseando entrada: {entry} | {str(e)}")
-            return tuple([None] * 7)
+            logger.warning("Error parseando entrada: %s | %s", entry, e)
+            return _EMPTY_ENTRY
+
+    @staticmethod
+    def _parse_nested_entry(entry: str) -> Optional[tuple]:
+        """
+        Parsea el formato extendido con paréntesis anidados en el texto de los códigos.
+        
+        Returns:
+            tuple de 7 elementos, o None si la entrada no tiene este formato.
+        """
+        initial_match = _RE_INITIAL.match(entry)
+        if not initial_match:
+            return None
+        linea = initial_match.group(1)
+        inner_content = initial_match.group(2)
+        fuerza_relacion = initial_match.group(3)
+        
+        # Extraer primer código y su texto (se permite anidamiento en el contenido)
+        id_farmaco_1_match = _RE_CODE1.match(inner_content)
+        if not id_farmaco_1_match:
+            return None
+        id_farmaco_1 = id_farmaco_1_match.group(1)
+        entity = id_farmaco_1_match.group(2).strip()
+        
+        # Posición después del primer bloque para capturar el resto
+        remaining = inner_content[id_farmaco_1_match.end():].strip()
+        
+        # Extraer la relación y el segundo código con su elemento asociado
+        relation_match = _RE_RELATION.match(remaining)
+        if not relation_match:
+            return None
+        relacion = relation_match.group(1).strip()
+        id_farmaco_2 = relation_match.group(2)
+        Elemento_Relacionado = relation_match.group(3).strip()
+        return (linea, id_farmaco_1, entity, relacion, id_farmaco_2, Elemento_Relacionado, fuerza_relacion)
+
+def _parse_block(lines: List[str]) -> List[tuple]:
+    """
+    Parsea un bloque de líneas TXT. Se ejecuta en los procesos del pool de DataLoader.
+    """
+    return [DataLoader._parse_data_entry(line) for line in lines]
 
 # Ejemplo de uso actualizado
 if __name__ == "__main__":
@@ -61,22 +61,22 @@ class GestionLogs:
                 handler.setLevel(nivel_num)
             self.logger.setLevel(nivel_num)
             
-    def debug(self, mensaje):
-        """Registra un mensaje de nivel DEBUG"""
-        self.logger.debug(mensaje)
+    def debug(self, mensaje, *args):
+        """Registra un mensaje de nivel DEBUG (formato % diferido con args)"""
+        self.logger.debug(mensaje, *args)
     
-    def info(self, mensaje):
-        """Registra un mensaje de nivel INFO"""
-        self.logger.info(mensaje)
+    def info(self, mensaje, *args):
+        """Registra un mensaje de nivel INFO (formato % diferido con args)"""
+        self.logger.info(mensaje, *args)
     
-    def warning(self, mensaje):
-        """Registra un mensaje de nivel WARNING"""
-        self.logger.warning(mensaje)
+    def warning(self, mensaje, *args):
+        """Registra un mensaje de nivel WARNING (formato % diferido con args)"""
+        self.logger.warning(mensaje, *args)
     
-    def error(self, mensaje):
-        """Registra un mensaje de nivel ERROR"""
-        self.logger.error(mensaje)
+    def error(self, mensaje, *args):
+        """Registra un mensaje de nivel ERROR (formato % diferido con args)"""
+        self.logger.error(mensaje, *args)
     
-    def critical(self, mensaje):
-        """Registra un mensaje de nivel CRITICAL"""
-        self.logger.critical(mensaje)
\ No newline at end of file
+    def critical(self, mensaje, *args):
+        """Registra un mensaje de nivel CRITICAL (formato % diferido con args)"""
+        self.logger.critical(mensaje, *args)
\ No newline at end of file
@@ -1,7 +1,6 @@
 import pandas as pd
 import argparse
 import sys
-import json
 import os
 import logging
 from datetime import datetime
@@ -12,119 +11,169 @@ from checkpoint import GestionCheckpoint
 from logs import GestionLogs
 from config import CONFIG
 from gestion_de_datos import DataLoader
+from serializacion import cargar_json, guardar_json, ResultSink
 
 # Crear un logger temporal para esta función hasta que se inicialice el gestor de logs
 logger = logging.getLogger(__name__)
 
-def cargar_datos(ruta_archivo, custom_logger=None):
+def _load_excel(ruta_archivo, processed_ids=None):
+    # Para Excel, usamos DataLoader con encabezado personalizado
+    custom_headers = ['A']
+    loader = DataLoader(ruta_archivo, has_header=False, custom_headers=custom_headers)
+    # Ajustar sheet_name según corresponda
+    return loader.load_csv_or_excel(sheet_name="Hoja 1", remove_garbage=True)
+
+def _load_csv(ruta_archivo, processed_ids=None):
+    # DataLoader lee el CSV con pyarrow (columnas de texto en formato Arrow) si está
+    # instalado, y devuelve chunks si el archivo es grande
+    loader = DataLoader(ruta_archivo)
+    return loader.load_csv_or_excel()
+
+def _load_json(ruta_archivo, processed_ids=None):
+    return pd.DataFrame(cargar_json(ruta_archivo))
+
+def _load_txt(ruta_archivo, processed_ids=None):
+    # Utilizamos el DataLoader modificado para TXT
+    # Las líneas ya registradas en el checkpoint se descartan antes de parsearlas
+    loader = DataLoader(ruta_archivo, chunk_size=CONFIG.get("batch_size", 10000), has_header=False,
+                        processed_ids=processed_ids)
+    return loader.load_csv_or_excel(remove_garbage=True)
+
+# Función de carga según la extensión del archivo
+_LOADERS = {
+    '.xlsx': _load_excel,
+    '.xls': _load_excel,
+    '.csv': _load_csv,
+    '.json': _load_json,
+    '.txt': _load_txt,
+}
+
+def cargar_datos(ruta_archivo, custom_logger=None, processed_ids=None):
     # Usar el logger proporcionado o el predeterminado
     log = custom_logger or logger
     
     log.info(f"Cargando datos desde {ruta_archivo}")
+    loader = _LOADERS.get(os.path.splitext(ruta_archivo)[1].lower())
+    if loader is None:
+        log.error(f"Formato de archivo no soportado: {ruta_archivo}")
+        sys.exit(1)
     try:
-        file_extension = ruta_archivo.split('.')[-1].lower()
-        if file_extension in ['xlsx', 'xls']:
-            # Para Excel, usamos DataLoader con encabezado personalizado
-            custom_headers = ['A']
-            loader = DataLoader(ruta_archivo, has_header=False, custom_headers=custom_headers)
-            # Ajustar sheet_name según corresponda
-            return loader.load_csv_or_excel(sheet_name="Hoja 1", remove_garbage=True)
-        elif file_extension == 'csv':
-            return pd.read_csv(ruta_archivo)
-        elif file_extension == 'json':
-            with open(ruta_archivo, 'r', encoding='utf-8') as f:
-                return pd.DataFrame(json.load(f))
-        elif file_extension == 'txt':
-            # Utilizamos el DataLoader modificado para TXT
-            loader = DataLoader(ruta_archivo, chunk_size=CONFIG.get("batch_size", 10000), has_header=False)
-            return loader.load_csv_or_excel(remove_garbage=True)
-        else:
-            log.error(f"Formato de archivo no soportado: {ruta_archivo}")
-            sys.exit(1)
+        return loader(ruta_archivo, processed_ids)
     except Exception as e:
         log.error(f"Error al cargar el archivo {ruta_archivo}: {e}")
         sys.exit(1)
 
-def guardar_resultados(resultados, prefijo="reporte_"):
+# Niveles de logs admitidos (--nivel_logs y COPENMED_NIVEL_LOGS)
+_NIVELES_LOGS = ["NONE", "ERROR", "INFO"]
+
+def leer_opciones_entorno():
     """
-    Guarda los resultados en archivos CSV y JSON
+    Lee las opciones definidas en las variables de entorno COPENMED_*.
+    Un COPENMED_NIVEL_LOGS no admitido termina la ejecución, como --nivel_logs.
 
-    Args:
-        resultados: Lista de diccionarios con los resultados
-        prefijo: Prefijo para el nombre de los archivos
+    Returns:
+        dict: Solo las opciones cuya variable está definida, ya convertidas.
     """
-    if not resultados:
-        logger.info("No hay resultados para guardar")
-        return
-        
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nombre_base = f"{prefijo}{timestamp}"
-    
-    # Guardar como JSON
-    ruta_json = f"{nombre_base}.json"
-    with open(ruta_json, 'w', encoding='utf-8') as f:
-        json.dump(resultados, f, ensure_ascii=False, indent=2)
-    logger.info(f"Resultados guardados en JSON: {ruta_json}")
-    
-    # Se puede agregar guardado en CSV si se requiere.
+    opciones = {}
+    if os.environ.get("COPENMED_DATOS"):
+        opciones["datos"] = os.environ["COPENMED_DATOS"]
+    for opcion, variable in (("max", "COPENMED_MAX"), ("batch", "COPENMED_BATCH")):
+        valor = os.environ.get(variable)
+        if valor:
+            opciones[opcion] = int(valor) if valor.isdigit() else None
+    for opcion, variable in (("reset", "COPENMED_RESET"), ("mostrar", "COPENMED_MOSTRAR")):
+        valor = os.environ.get(variable)
+        if valor:
+            opciones[opcion] = valor.lower() in ("s", "1", "true")
+    nivel = os.environ.get("COPENMED_NIVEL_LOGS")
+    if nivel:
+        if nivel.upper() not in _NIVELES_LOGS:
+            print(f"COPENMED_NIVEL_LOGS inválido: '{nivel}' (opciones: {', '.join(_NIVELES_LOGS)})",
+                  file=sys.stderr)
+            sys.exit(2)
+        opciones["nivel_logs"] = nivel.upper()
+    return opciones
+
+def obtener_config_entorno():
+    """
+    Obtiene las opciones de las variables de entorno COPENMED_* para ejecuciones
+    sin terminal (CI, tareas programadas). Las opciones no definidas toman su valor
+    por defecto.
+
+    Returns:
+        dict: Opciones, o None si no está definida COPENMED_DATOS.
+    """
+    entorno = leer_opciones_entorno()
+    if "datos" not in entorno:
+        return None
+    opciones = {"max": None, "batch": None, "reset": False, "mostrar": False, "nivel_logs": "INFO"}
+    opciones.update(entorno)
+    return opciones
 
-def obtener_config_interactivo():
+def obtener_config_interactivo(entorno=None):
     """
     Muestra un menú interactivo para ingresar opciones y las guarda en un archivo JSON
     para usarlas en próximas ejecuciones.
 
+    Args:
+        entorno: Opciones ya definidas en variables de entorno (ver leer_opciones_entorno);
+            solo se pregunta por las que faltan.
+
     Returns:
         dict: Opciones ingresadas.
     """
+    entorno = entorno or {}
     config_filename = "opciones_config.json"
     config_defaults = {}
     if os.path.exists(config_filename):
         respuesta = input("Se encontraron opciones guardadas. ¿Desea cargarlas? (s/n): ").strip().lower()
         if respuesta == 's':
-            with open(config_filename, 'r', encoding='utf-8') as f:
-                config_defaults = json.load(f)
+            config_defaults = cargar_json(config_filename)
             print("Opciones cargadas.")
     
-    ruta = input(f"Ingrese la ruta del archivo de datos [{config_defaults.get('datos', '')}]: ") or config_defaults.get("datos", "")
-    max_rel = input(f"Ingrese el número máximo de relaciones a procesar (limita la cantidad de datos a analizar) [{config_defaults.get('max', '')}]: ") or config_defaults.get("max", "")
-    batch = input(f"Ingrese el tamaño del lote para procesamiento (cuántos registros procesar a la vez, útil para archivos grandes) [{config_defaults.get('batch', '')}]: ") or config_defaults.get("batch", "")
-    reset = input(f"¿Desea reiniciar el checkpoint? (s/n) (Si elige 's', comenzará el procesamiento desde el principio) [{config_defaults.get('reset', 'n')}]: ") or config_defaults.get("reset", "n")
-    mostrar = input(f"¿Desea mostrar resultados en consola? (s/n) [{config_defaults.get('mostrar', 'n')}]: ") or config_defaults.get("mostrar", "n")
-    nivel_logs = input(f"Ingrese el nivel de logs (NONE=sin mensajes, ERROR=solo errores, INFO=todos los mensajes) [{config_defaults.get('nivel_logs', 'INFO')}]: ") or config_defaults.get("nivel_logs", "INFO")
-    
-    # Construir diccionario de opciones
-    interactive_args = {
-       "datos": ruta,
-       "max": int(max_rel) if max_rel and max_rel.isdigit() else None,
-       "batch": int(batch) if batch and batch.isdigit() else None,
-       "reset": True if reset.lower() == 's' else False,
-       "mostrar": True if mostrar.lower() == 's' else False,
-       "nivel_logs": nivel_logs.upper()
-    }
+    # Construir diccionario de opciones (las definidas en el entorno no se preguntan)
+    interactive_args = {}
+    if "datos" not in entorno:
+        ruta = input(f"Ingrese la ruta del archivo de datos [{config_defaults.get('datos', '')}]: ") or config_defaults.get("datos", "")
+        interactive_args["datos"] = ruta
+    if "max" not in entorno:
+        max_rel = input(f"Ingrese el número máximo de relaciones a procesar (limita la cantidad de datos a analizar) [{config_defaults.get('max', '')}]: ") or config_defaults.get("max", "")
+        interactive_args["max"] = int(max_rel) if max_rel and str(max_rel).isdigit() else None
+    if "batch" not in entorno:
+        batch = input(f"Ingrese el tamaño del lote para procesamiento (cuántos registros procesar a la vez, útil para archivos grandes) [{config_defaults.get('batch', '')}]: ") or config_defaults.get("batch", "")
+        interactive_args["batch"] = int(batch) if batch and str(batch).isdigit() else None
+    if "reset" not in entorno:
+        reset = input(f"¿Desea reiniciar el checkpoint? (s/n) (Si elige 's', comenzará el procesamiento desde el principio) [{config_defaults.get('reset', 'n')}]: ") or config_defaults.get("reset", "n")
+        interactive_args["reset"] = True if str(reset).lower() == 's' else False
+    if "mostrar" not in entorno:
+        mostrar = input(f"¿Desea mostrar resultados en consola? (s/n) [{config_defaults.get('mostrar', 'n')}]: ") or config_defaults.get("mostrar", "n")
+        interactive_args["mostrar"] = True if str(mostrar).lower() == 's' else False
+    if "nivel_logs" not in entorno:
+        nivel_logs = input(f"Ingrese el nivel de logs (NONE=sin mensajes, ERROR=solo errores, INFO=todos los mensajes) [{config_defaults.get('nivel_logs', 'INFO')}]: ") or config_defaults.get("nivel_logs", "INFO")
+        interactive_args["nivel_logs"] = nivel_logs.upper()
+    interactive_args.update(entorno)
     # Guardar las opciones para la próxima ejecución
-    with open(config_filename, 'w', encoding='utf-8') as f:
-        json.dump(interactive_args, f, indent=2)
+    guardar_json(interactive_args, config_filename)
     return interactive_args
 
-def guardar_resultados(resultados, prefijo="relaciones_invalidas_"):
+def crear_sink_resultados(prefijo="relaciones_invalidas_", indentar=False):
     """
-    Guarda los resultados en un archivo JSON con un nombre identificable.
-    El nombre incluye el prefijo, la fecha y hora actuales en formato legible
-    y la cantidad de relaciones inválidas encontradas.
+    Crea el ResultSink donde se escriben las relaciones inválidas a medida que se
+    verifican (NDJSON). Al cerrarse se convierte en un archivo JSON con un nombre
+    identificable: el prefijo, la fecha y hora de inicio en formato legible
+    y la cantidad de relaciones inválidas encontradas. Con indentar=False el JSON
+    final tiene un registro por línea.
     """
     # Fecha en formato más legible (día-mes-año)
     fecha = datetime.now().strftime("%d-%m-%Y")
     # Hora en formato de 24 horas
     hora = datetime.now().strftime("%H-%M")
-    # Cantidad de relaciones inválidas
-    cantidad = len(resultados)
+    nombre_base = f"{prefijo}{fecha}_hora_{hora}"
     
-    # Nombre de archivo más descriptivo
-    filename = f"{prefijo}{fecha}_hora_{hora}_total_{cantidad}.json"
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(resultados, f, ensure_ascii=False, indent=2)
-    print(f"✅ Resultados guardados en: {filename}")
+    # La cantidad de relaciones inválidas solo se conoce al terminar
+    return ResultSink(f"{nombre_base}.ndjson",
+                      ruta_json=lambda cantidad: f"{nombre_base}_total_{cantidad}.json",
+                      indentar=indentar)
 
 def main():
     """Función principal que ejecuta el verificador de relaciones médicas"""
@@ -140,7 +189,7 @@ def main():
         parser.add_argument("--batch", type=int, help="Tamaño del lote para procesamiento")
         parser.add_argument("--mostrar", action="store_true", help="Mostrar resultados por consola")
         parser.add_argument("--reset", action="store_true", help="Reiniciar el checkpoint")
-        parser.add_argument("--nivel_logs", choices=["NONE", "ERROR", "INFO"], help="Nivel de logs a mostrar")
+        parser.add_argument("--nivel_logs", choices=_NIVELES_LOGS, help="Nivel de logs a mostrar")
         args = parser.parse_args()
         opciones = {
             "datos": args.datos,
@@ -150,10 +199,13 @@ def main():
             "reset": args.reset,
             "nivel_logs": args.nivel_logs if args.nivel_logs else "INFO"
         }
+    elif os.environ.get("COPENMED_DATOS"):
+        # Sin argumentos pero con variables de entorno: no se pregunta nada por terminal
+        opciones = obtener_config_entorno()
     else:
-        # Modo interactivo: se solicita al usuario ingresar las opciones por terminal
+        # Modo interactivo: se solicitan por terminal las opciones que no estén en el entorno
         print("Modo interactivo de configuración:")
-        opciones = obtener_config_interactivo()
+        opciones = obtener_config_interactivo(leer_opciones_entorno())
 
     # Configurar el nivel de logs según la opción
     nivel = opciones.get("nivel_logs", "INFO")
@@ -168,7 +220,7 @@ def main():
         config["batch_size"] = opciones["batch"]
     
     # Inicializar gestor de checkpoint
-    checkpoint_manager = GestionCheckpoint()
+    checkpoint_manager = GestionCheckpoint(config.get("ruta_checkpoint", "checkpoint.json"))
     
     # Reiniciar checkpoint si se solicita
     if opciones.get("reset"):
@@ -178,25 +230,19 @@ def main():
     
     # Cargar datos usando la función que soporta CSV, JSON, Excel y TXT
     # Cargar datos usando la función que soporta CSV, JSON, Excel y TXT
-    datos = cargar_datos(opciones["datos"], logger)
-    
-    # En caso de que DataLoader para TXT retorne un generador, se consolidan los chunks
-    if not isinstance(datos, pd.DataFrame):
-        lista_df = []
-        contador = 0
-        for chunk in datos:
-            lista_df.append(chunk)
-            contador += len(chunk)
-            if opciones.get("max") and contador >= opciones["max"]:
-                break
-        datos = pd.concat(lista_df, ignore_index=True)
+    datos = cargar_datos(opciones["datos"], logger, processed_ids=checkpoint_manager)
     
+    # Si DataLoader para TXT retorna un generador, los chunks se pasan tal cual al
+    # verificador, que los procesa a medida que se leen (max_procesar limita el total)
     if nivel != "NONE":
-        logger.info(f"Datos cargados: {len(datos)} relaciones")
+        if isinstance(datos, pd.DataFrame):
+            logger.info(f"Datos cargados: {len(datos)} relaciones")
+        else:
+            logger.info("Datos cargados: lectura por chunks")
     
     # Inicializar y ejecutar el verificador
     try:
-        verificador = VerificadorRelaciones(config)
+        verificador = VerificadorRelaciones(config, checkpoint_manager, logger)
         
         # Mostrar información del checkpoint
         ultimo_id = checkpoint_manager.obtener_ultimo_id_procesado()
@@ -207,22 +253,25 @@ def main():
         # Procesar datos
         if nivel != "NONE":
             logger.info("Iniciando procesamiento...")
-        relaciones_invalidas, total = verificador.procesar_datos(datos)
+        # Las relaciones inválidas se escriben en disco a medida que se encuentran
+        with verificador, crear_sink_resultados(prefijo="relaciones_invalidas_",
+                                                indentar=config.get("reporte_indentado", False)) as sink:
+            _, total = verificador.procesar_datos(datos, sink)
         
-        # Mostrar y guardar resultados
+        # Mostrar resultados
         if nivel != "NONE":
-            if relaciones_invalidas:
-                logger.info(f"Se encontraron {len(relaciones_invalidas)} relaciones inválidas de {total} verificadas")
+            if sink.total:
+                logger.info(f"Se encontraron {sink.total} relaciones inválidas de {total} verificadas")
             else:
                 logger.info(f"No se encontraron relaciones inválidas en las {total} relaciones verificadas")
         
-        if relaciones_invalidas:
-            guardar_resultados(relaciones_invalidas, prefijo="relaciones_invalidas_")
+        if sink.ruta_final:
+            print(f"✅ Resultados guardados en: {sink.ruta_final}")
         
         if opciones.get("mostrar"):
-            print("\nVista previa de relaciones inválidas:")
-            if relaciones_invalidas:
-                for registro in relaciones_invalidas[:5]:
+            print("\nVista previa de relaciones inválidas (últimas encontradas):")
+            if sink.ultimos:
+                for registro in sink.ultimos:
                     print(registro)
             else:
                 print("No se encontraron relaciones inválidas.")
@@ -1,101 +1,564 @@
+import logging
 import os
-import json
+import queue
+import re
+import threading
 import time
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain, cycle, islice, repeat
 
+import numpy as np
 import pandas as pd
 
-# modulo 4 despues de checkpoint_manager.py
-from checkpoint_manager import CheckpointManager
+# modulo 4 despues de checkpoint.py
+from checkpoint import GestionCheckpoint
 from config import CONFIG
+from serializacion import cargar_json, deserializar_json, guardar_json, serializar_json
+
+# Línea de la respuesta a un prompt con varias relaciones: "ID: VÁLIDO" o "ID: INVÁLIDO: justificación"
+_RE_RESPUESTA_LOTE = re.compile(
+    r"^[ \t]*(?:ID[ \t]*=?[ \t]*)?([^\s:]+)[ \t]*:[ \t]*(V[ÁA]LIDO|INV[ÁA]LIDO)\b(?:[ \t]*:?[ \t]*(.*))?$",
+    re.MULTILINE | re.IGNORECASE
+)
+# Códigos HTTP con los que Ollama indica que está saturado; la petición se reintenta con espera exponencial
+_ESTADOS_SATURACION = (429, 503)
+_CABECERAS_JSON = {"Content-Type": "application/json"}
+# Espera máxima (segundos) entre reintentos
+_ESPERA_MAXIMA_S = 30
+# Segundos durante los que una verificación correcta del modelo evita repetir la prueba de generación
+_VIGENCIA_VERIFICACION_S = 3600
+# Veredictos "VÁLIDO" / "INVÁLIDO" (con o sin tilde); el grupo 1 indica "INVÁLIDO"
+_RE_VEREDICTO = re.compile(r"\b(IN)?V[ÁA]LIDO\b", re.IGNORECASE)
+# Cierre del razonamiento de los modelos que piensan antes de responder (p. ej. deepseek-r1)
+_FIN_RAZONAMIENTO = "</think>"
+
+
+def _inicio_respuesta(texto):
+    """Posición donde empieza la respuesta final, después del bloque de razonamiento si lo hay"""
+    fin = texto.rfind(_FIN_RAZONAMIENTO)
+    return 0 if fin < 0 else fin + len(_FIN_RAZONAMIENTO)
+
+
+def _razonando(texto):
+    """Indica si la generación sigue dentro de un bloque de razonamiento sin cerrar"""
+    return texto.lstrip().startswith("<think>") and _FIN_RAZONAMIENTO not in texto
+
+
+# Nombres internos de las columnas usadas al verificar, comunes a los formatos original y TXT
+_COLUMNAS_CANONICAS = ["id", "entidad1", "relacion", "entidad2", "fuerza"]
+
+
+def _es_vacio(valor):
+    """Indica si un campo de la relación falta: None, NaN o texto en blanco"""
+    if valor is None or valor is pd.NA or (isinstance(valor, float) and valor != valor):
+        return True
+    return not str(valor).strip()
+
+
+def _compactar(plantilla):
+    """Quita la sangría y los bordes de una plantilla de prompt: son tokens que el modelo procesa sin aportar nada"""
+    return "\n".join(linea.strip() for linea in plantilla.strip().splitlines())
+
 
 class VerificadorRelaciones:
-    def __init__(self, config=CONFIG):
+    # Plantillas de los prompts (se completan con str.format)
+    _PROMPT_FUERZA_TMPL = _compactar("""
+            Como sistema experto en medicina, evalúa si esta relación es médicamente válida considerando la fuerza de la relación:
+            
+            ID: {id}
+            Entidad 1: {e1}
+            Relación: {rel}
+            Fuerza de la Relación: {fuerza}
+            Entidad 2: {e2}
+            
+        Considera que:
+         - Un valor cercano a 1 indica una relación muy fuerte.
+         - Un valor cercano a 0 indica que la relación apenas tiene relevancia.
+         - Un valor intermedio (por ejemplo, 0.5) sugiere que la relación es moderada.
+        
+        Basándote en estos criterios y en el conocimiento médico establecido, responde:
+        - Si la relación es médicamente válida (y coherente con la fuerza indicada), responde "VÁLIDO".
+        - Si la relación es médicamente inválida o la fuerza de la relación no la respalda, responde "INVÁLIDO" y explica brevemente por qué.
+           """)
+    
+    _PROMPT_TMPL = _compactar("""
+            Como sistema experto en medicina, evalúa si esta relación es médicamente válida:
+            
+            ID: {id}
+            Entidad 1: {e1}
+            Relación: {rel}
+            Entidad 2: {e2}
+            
+            Si "{e1}" implica "{e2}" es médicamente correcto, responde solamente "VÁLIDO".
+            Si NO es correcto, responde "INVÁLIDO" y explica brevemente por qué.
+            
+            Basa tu respuesta únicamente en conocimiento médico establecido.
+            """)
+    
+    # Prompt con varias relaciones; {relaciones} es una línea por relación
+    _BATCH_PROMPT_TMPL = _compactar("""
+            Como sistema experto en medicina, evalúa si cada una de las siguientes {n} relaciones es médicamente válida:
+            
+            {relaciones}
+            {criterio_fuerza}
+            Responde exactamente una línea por relación, con el formato "ID: VÁLIDO" si es médicamente
+            correcta o "ID: INVÁLIDO: explicación breve" si no lo es.
+            
+            Basa tu respuesta únicamente en conocimiento médico establecido.
+            """)
+    
+    # Línea de cada relación dentro del prompt por lotes
+    _BATCH_LINEA_TMPL = "{n}) ID={id}; Entidad 1: {e1}; Relación: {rel}; Entidad 2: {e2}"
+    _BATCH_LINEA_FUERZA_TMPL = "{n}) ID={id}; Entidad 1: {e1}; Relación: {rel}; Fuerza de la Relación: {fuerza}; Entidad 2: {e2}"
+    
+    _BATCH_CRITERIO_FUERZA = "\n" + _compactar("""
+            La fuerza de la relación va de 0 (apenas relevante) a 1 (muy fuerte); una relación
+            solo es válida si la fuerza indicada es coherente con el conocimiento médico.
+            """) + "\n"
+    
+    def __init__(self, config=CONFIG, checkpoint_manager=None, logger=None):
         """
         Inicializa el verificador de relaciones médicas utilizando Ollama
 
         Args:
             config: Diccionario con configuración del procesamiento
+            checkpoint_manager: GestionCheckpoint a reutilizar; si no se indica se crea uno
+            logger: Logger para los mensajes de progreso (por ejemplo el de GestionLogs)
         """
         self.config = config
+        self.logger = logger or logging.getLogger(__name__)
         self.modelo = config.get("modelo", "deepseek")  # Usar el modelo de la configuración
-        self.host = "http://localhost:11434"  # Host de Ollama local
+        # Servidores de Ollama; las peticiones de verificación se reparten entre ellos
+        self.hosts = config.get("hosts") or ["http://localhost:11434"]
+        self.host = self.hosts[0]  # Primer servidor disponible
+        self._hosts_ciclo = cycle(self.hosts)
+        self._hosts_lock = threading.Lock()
         self.batch_size = config.get("batch_size", 32)
         self.max_procesar = config.get("max_procesar", 5)
-        self.checkpoint_manager = CheckpointManager(path=config.get("ruta_checkpoint", "checkpoint.json"))
+        # Peticiones simultáneas por servidor
+        self.concurrencia = max(1, config.get("concurrencia", 8))
+        # Relaciones evaluadas en un mismo prompt (1 = una petición por relación)
+        self.micro_batch = max(1, config.get("micro_batch", 8))
+        # Tiempo que Ollama mantiene el modelo cargado en memoria entre peticiones
+        self.keep_alive = config.get("keep_alive", "30m")
+        # Ollama solo lee los parámetros de muestreo dentro de "options"; num_predict limita
+        # los tokens generados por relación (sin límite si no se configura)
+        self.temperatura = config.get("temperatura", 0.1)
+        self.num_predict = config.get("num_predict")
+        # Reintentos de una petición rechazada por saturación (la concurrencia la limita el pool de hilos)
+        self.max_reintentos = max(0, config.get("max_reintentos", 3))
+        # (conexión, lectura) en segundos; en streaming la lectura cuenta entre fragmentos, por lo
+        # que solo debe cubrir la carga del modelo antes del primer token
+        self.timeout = (5, config.get("timeout_lectura_s", 300))
+        # Sesión HTTP compartida: reutiliza las conexiones con Ollama entre peticiones. El pool
+        # guarda una conexión por hilo de cada servidor (por defecto requests solo conserva 10)
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        adaptador = requests.adapters.HTTPAdapter(pool_connections=len(self.hosts),
+                                                  pool_maxsize=self.concurrencia)
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+        self.checkpoint_manager = checkpoint_manager or GestionCheckpoint(config.get("ruta_checkpoint", "checkpoint.json"))
+        # Caché de verificaciones por relación, persistida junto al checkpoint
+        self.ruta_cache = config.get("ruta_cache", "verificacion_cache.json")
+        self._cache = self._cargar_cache()
+        self._cache_modificada = False
+        # La caché completa se reescribe como mucho cada intervalo_cache_s segundos durante el
+        # procesamiento (escritura diferida); al terminar siempre se guarda
+        self.intervalo_cache_s = config.get("intervalo_cache_s", 10.0)
+        # Tipos de relación que se marcan como inválidos sin consultar al modelo
+        self.relaciones_no_permitidas = {str(tipo).strip().lower()
+                                         for tipo in config.get("relaciones_no_permitidas", [])}
+        self._ultimo_guardado_cache = time.monotonic()
         
         self._verificar_modelo()
         
+    def cerrar(self):
+        """Guarda la caché pendiente y cierra las conexiones con Ollama"""
+        self.guardar_cache()
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cerrar()
+        return False
+    
     def _verificar_modelo(self):
+        """
+        Comprueba que el modelo responde en cada servidor de Ollama. Los servidores en
+        los que no responde se retiran del reparto de peticiones; si no queda ninguno
+        se termina la ejecución.
+        """
+        disponibles = [host for host in self.hosts if self._verificar_modelo_en(host)]
+        if not disponibles:
+            exit(1)
+        if len(disponibles) < len(self.hosts):
+            self.logger.warning("Se excluyen los servidores sin el modelo %s: %s", self.modelo,
+                                ", ".join(host for host in self.hosts if host not in disponibles))
+            self.hosts = disponibles
+            self.host = disponibles[0]
+            with self._hosts_lock:
+                self._hosts_ciclo = cycle(disponibles)
+    
+    def _verificar_modelo_en(self, host):
+        """
+        Comprueba que el modelo responde en un servidor y lo deja cargado. Si el checkpoint
+        registra una verificación correcta de la última hora, solo se comprueba que el
+        modelo siga instalado (/api/tags) en lugar de cargarlo.
+        
+        Returns:
+            bool: True si el modelo está disponible en el servidor
+        """
+        if self._modelo_instalado(host):
+            self.logger.info("Modelo %s disponible en %s (verificado recientemente)", self.modelo, host)
+            return True
         try:
-            response = requests.post(
-                f"{self.host}/api/generate",
-                json={"model": self.modelo, "prompt": "Test"}
+            # Un prompt vacío solo carga el modelo, que queda en memoria durante keep_alive
+            response = self.session.post(
+                f"{host}/api/generate",
+                json={"model": self.modelo, "prompt": "", "stream": False, "keep_alive": self.keep_alive},
+                timeout=self.timeout
             )
             if response.status_code != 200:
-                raise Exception(f"Modelo {self.modelo} no disponible en Ollama")
-            print(f"✅ Modelo {self.modelo} conectado correctamente")
+                raise Exception(f"Modelo {self.modelo} no disponible en Ollama ({host})")
+            self.checkpoint_manager.registrar_verificacion_modelo(self.modelo)
+            self.logger.info("Modelo %s conectado correctamente en %s", self.modelo, host)
+            return True
         except Exception as e:
-            print(f"❌ Error: {e}")
-            exit(1)
+            self.logger.error("Error: %s", e)
+            return False
+    
+    def _siguiente_host(self):
+        """Devuelve el siguiente servidor del reparto round-robin (seguro entre hilos)"""
+        with self._hosts_lock:
+            return next(self._hosts_ciclo)
+    
+    def _opciones(self, n_relaciones=1):
+        """Opciones de generación de Ollama para un prompt con n_relaciones relaciones"""
+        opciones = {"temperature": self.temperatura}
+        if self.num_predict:
+            opciones["num_predict"] = self.num_predict * n_relaciones
+        return opciones
+    
+    def _generar(self, prompt, n_relaciones=1, completo=None):
+        """
+        Envía un prompt a /api/generate del siguiente servidor. Si Ollama responde que
+        está saturado (429/503) se reintenta, en el servidor siguiente, tras esperar
+        1, 2, 4... segundos (hasta _ESPERA_MAXIMA_S)
+        
+        La respuesta se recibe en streaming: cada vez que llega un salto de línea se
+        consulta completo(texto) y, si devuelve True, se cierra la conexión sin esperar
+        al resto de la generación (Ollama la cancela al desconectarse el cliente). En ese
+        caso se devuelve el texto hasta el último salto de línea, sin la línea incompleta.
+        
+        Args:
+            prompt: Texto del prompt
+            n_relaciones: Relaciones evaluadas en el prompt (para el límite de tokens)
+            completo: Función opcional que indica si el texto recibido ya basta
+        
+        Returns:
+            tuple: (código HTTP del último intento, texto generado)
+        """
+        # El cuerpo se serializa una vez (con orjson si está disponible) y se reutiliza en los reintentos
+        cuerpo = serializar_json({
+            "model": self.modelo,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": self._opciones(n_relaciones)
+        }).encode("utf-8")
+        for intento in range(self.max_reintentos + 1):
+            response = self.session.post(f"{self._siguiente_host()}/api/generate", data=cuerpo,
+                                         headers=_CABECERAS_JSON, stream=True, timeout=self.timeout)
+            with response:
+                if response.status_code != 200:
+                    if response.status_code not in _ESTADOS_SATURACION or intento == self.max_reintentos:
+                        return response.status_code, ""
+                else:
+                    partes = []
+                    for linea in response.iter_lines():
+                        if not linea:
+                            continue
+                        fragmento = deserializar_json(linea)
+                        texto = fragmento.get("response", "")
+                        partes.append(texto)
+                        if fragmento.get("done"):
+                            break
+                        if completo is not None and "\n" in texto:
+                            recibido = "".join(partes)
+                            if completo(recibido):
+                                return response.status_code, recibido[:recibido.rfind("\n") + 1]
+                    return response.status_code, "".join(partes)
+            time.sleep(min(2 ** intento, _ESPERA_MAXIMA_S))
+    
+    def _modelo_instalado(self, host):
+        """
+        Devuelve True si hay una verificación reciente del modelo y el servidor lo sigue listando
+        """
+        verificado = self.checkpoint_manager.obtener_verificacion_modelo(self.modelo)
+        if verificado is None or time.time() - verificado >= _VIGENCIA_VERIFICACION_S:
+            return False
+        try:
+            response = self.session.get(f"{host}/api/tags", timeout=2)
+            if response.status_code != 200:
+                return False
+            nombres = {modelo.get("name") for modelo in response.json().get("models", [])}
+        except (requests.RequestException, ValueError):
+            return False
+        return self.modelo in nombres or f"{self.modelo}:latest" in nombres
+    
+    def _firma_cache(self):
+        """
+        Parámetros que determinan los veredictos: la caché solo es válida para la misma firma
+        """
+        return {"modelo": self.modelo, "temperatura": self.temperatura}
+    
+    def _cargar_cache(self):
+        """
+        Carga la caché de verificaciones desde ruta_cache; si no existe, o se generó con
+        otro modelo o temperatura (o sin firma), devuelve una vacía
+        """
+        if not os.path.exists(self.ruta_cache):
+            return {}
+        try:
+            contenido = cargar_json(self.ruta_cache)
+            if not isinstance(contenido, dict) or contenido.get("firma") != self._firma_cache():
+                self.logger.info("La caché %s corresponde a otra configuración del modelo; se descarta",
+                                 self.ruta_cache)
+                return {}
+            return {tuple(entrada["clave"]): entrada["resultado"] for entrada in contenido["entradas"]}
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.warning("No se pudo leer la caché %s: %s", self.ruta_cache, e)
+            return {}
+    
+    def guardar_cache(self, forzar=True):
+        """
+        Guarda la caché de verificaciones si cambió. La escritura es atómica.
+        
+        Args:
+            forzar: Si es False, solo se guarda cuando han pasado intervalo_cache_s
+                segundos desde el último guardado (la caché crece con cada lote y
+                reescribirla entera tras cada uno frenaría el procesamiento)
+        """
+        if not self._cache_modificada:
+            return
+        if not forzar and time.monotonic() - self._ultimo_guardado_cache < self.intervalo_cache_s:
+            return
+        self._cache_modificada = False
+        self._ultimo_guardado_cache = time.monotonic()
+        entradas = [{"clave": list(clave), "resultado": resultado} for clave, resultado in list(self._cache.items())]
+        ruta_tmp = self.ruta_cache + ".tmp"
+        guardar_json({"firma": self._firma_cache(), "entradas": entradas}, ruta_tmp, indentar=False)
+        os.replace(ruta_tmp, self.ruta_cache)
+    
+    @staticmethod
+    def _copiar_resultado(resultado, relacion):
+        """
+        Copia un resultado asignándole el id y las entidades de otra relación equivalente
+        """
+        id_relacion, entidad1, tipo_relacion, entidad2, *_ = relacion
+        return dict(resultado, id=id_relacion, entidad1=entidad1, relacion=tipo_relacion, entidad2=entidad2)
+    
+    @staticmethod
+    def _clave_cache(entidad1, tipo_relacion, entidad2, fuerza_relacion):
+        """
+        Clave normalizada de una relación: sin mayúsculas ni espacios en los extremos, y con
+        la fuerza en forma numérica canónica para que "0.500000", "0.5" y 0.5 coincidan
+        """
+        return (str(entidad1).strip().lower(), str(tipo_relacion).strip().lower(), str(entidad2).strip().lower(),
+                VerificadorRelaciones._clave_fuerza(fuerza_relacion))
+    
+    @staticmethod
+    def _clave_fuerza(fuerza_relacion):
+        # La fuerza forma parte de la clave porque cambia el prompt y el criterio de validez
+        if fuerza_relacion is None:
+            return None
+        try:
+            return repr(float(fuerza_relacion))
+        except (TypeError, ValueError):
+            return str(fuerza_relacion).strip()
+    
+    @staticmethod
+    def _normalizar_columna(serie):
+        """
+        Versión vectorizada de la normalización de _clave_cache (str, strip y lower) para una
+        columna completa. En columnas categóricas solo se normalizan las categorías.
+        
+        Returns:
+            list: Textos normalizados en el orden de la columna
+        """
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            categorias = serie.cat.categories.astype(str).str.strip().str.lower()
+            # El código -1 (valor ausente) toma el último elemento: "nan", como str(nan)
+            normalizadas = np.append(categorias.to_numpy(dtype=object), "nan")
+            return normalizadas[serie.cat.codes.to_numpy()].tolist()
+        # Según la versión de pandas, astype(str) conserva los ausentes: se igualan a "nan"
+        return serie.astype(str).str.strip().str.lower().fillna("nan").tolist()
     
     # Se modifica la función para incluir el parámetro opcional fuerza_relacion (solo aplicable al formato TXT)
     def verificar_relacion(self, id_relacion, entidad1, tipo_relacion, entidad2, fuerza_relacion=None):
-        if fuerza_relacion is not None:
-            prompt = f"""
-            Como sistema experto en medicina, evalúa si esta relación es médicamente válida considerando la fuerza de la relación:
-            
-            ID: {id_relacion}
-            Entidad 1: {entidad1}
-            Relación: {tipo_relacion}
-            Fuerza de la Relación: {fuerza_relacion}
-            Entidad 2: {entidad2}
-            
-        Considera que:
-         - Un valor cercano a 1 indica una relación muy fuerte.
-         - Un valor cercano a 0 indica que la relación apenas tiene relevancia.
-         - Un valor intermedio (por ejemplo, 0.5) sugiere que la relación es moderada.
+        """
+        Verifica una relación con Ollama, reutilizando el resultado si la misma
+        relación ya se verificó antes (en esta u otra ejecución).
+        """
+        return self.verificar_relaciones([(id_relacion, entidad1, tipo_relacion, entidad2, fuerza_relacion)])[0]
+    
+    def verificar_relaciones(self, relaciones, claves=None):
+        """
+        Verifica varias relaciones. Las inválidas por su estructura y las que ya están
+        en la caché no se consultan; el resto se envía a Ollama en prompts de hasta
+        micro_batch relaciones.
         
-        Basándote en estos criterios y en el conocimiento médico establecido, responde:
-        - Si la relación es médicamente válida (y coherente con la fuerza indicada), responde "VÁLIDO".
-        - Si la relación es médicamente inválida o la fuerza de la relación no la respalda, responde "INVÁLIDO" y explica brevemente por qué.
-           """
+        Args:
+            relaciones: Lista de tuplas (id_relacion, entidad1, tipo_relacion, entidad2[, fuerza_relacion])
+            claves: Claves de caché ya calculadas para las relaciones (opcional)
+        
+        Returns:
+            Lista de resultados en el mismo orden que las relaciones
+        """
+        resultados = [None] * len(relaciones)
+        pendientes = []
+        for i, relacion in enumerate(relaciones):
+            id_relacion, entidad1, tipo_relacion, entidad2, *resto = relacion
+            fuerza_relacion = resto[0] if resto else None
+            if claves is not None:
+                clave = claves[i]
+            else:
+                clave = self._clave_cache(entidad1, tipo_relacion, entidad2, fuerza_relacion)
+            motivo = self._motivo_invalidez_estructural(entidad1, tipo_relacion, entidad2, clave)
+            if motivo is not None:
+                resultados[i] = {
+                    "id": id_relacion,
+                    "entidad1": entidad1,
+                    "relacion": tipo_relacion,
+                    "entidad2": entidad2,
+                    "validez": "inválido",
+                    "justificacion": motivo
+                }
+                continue
+            resultado = self._cache.get(clave)
+            if resultado is not None:
+                resultados[i] = self._copiar_resultado(resultado, relacion)
+            else:
+                pendientes.append((i, clave, (id_relacion, entidad1, tipo_relacion, entidad2, fuerza_relacion)))
+        
+        for j in range(0, len(pendientes), self.micro_batch):
+            grupo = pendientes[j:j + self.micro_batch]
+            if len(grupo) == 1:
+                respuestas = [self._consultar_modelo(*grupo[0][2])]
+            else:
+                respuestas = self._consultar_modelo_lote([args for _, _, args in grupo])
+            for (i, clave, _), resultado in zip(grupo, respuestas):
+                # Los errores de la API no se guardan para que se reintenten
+                if resultado["validez"] != "error":
+                    self._cache[clave] = resultado
+                    self._cache_modificada = True
+                resultados[i] = resultado
+        return resultados
+    
+    def _motivo_invalidez_estructural(self, entidad1, tipo_relacion, entidad2, clave):
+        """
+        Reglas locales que invalidan una relación sin consultar al modelo.
+        
+        Args:
+            clave: Clave de caché de la relación (campos ya normalizados)
+        
+        Returns:
+            str con el motivo de invalidez, o None si la relación debe verificarse con el modelo
+        """
+        if _es_vacio(entidad1) or _es_vacio(entidad2):
+            return "Falta una de las entidades de la relación"
+        if _es_vacio(tipo_relacion):
+            return "Falta el tipo de relación"
+        if clave[0] == clave[2]:
+            return "La relación une una entidad consigo misma"
+        if clave[1] in self.relaciones_no_permitidas:
+            return f"Tipo de relación no permitido: {tipo_relacion}"
+        return None
+    
+    def _consultar_modelo_lote(self, relaciones, reintentar=True):
+        """
+        Evalúa varias relaciones con un único prompt. Si la respuesta solo cubre parte
+        del lote, las relaciones que faltan se piden de nuevo juntas en otro prompt; las
+        que siguen sin aparecer con el formato esperado se consultan una a una.
+        
+        Args:
+            relaciones: Lista de tuplas (id_relacion, entidad1, tipo_relacion, entidad2, fuerza_relacion)
+            reintentar: Si se repite el prompt con las relaciones que falten en la respuesta
+        
+        Returns:
+            Lista de resultados en el mismo orden que las relaciones
+        """
+        con_fuerza = any(fuerza is not None for *_, fuerza in relaciones)
+        lineas = [
+            (self._BATCH_LINEA_TMPL if fuerza is None else self._BATCH_LINEA_FUERZA_TMPL).format(
+                n=n, id=id_relacion, e1=entidad1, rel=tipo_relacion, e2=entidad2, fuerza=fuerza)
+            for n, (id_relacion, entidad1, tipo_relacion, entidad2, fuerza) in enumerate(relaciones, 1)
+        ]
+        prompt = self._BATCH_PROMPT_TMPL.format(
+            n=len(relaciones),
+            relaciones="\n".join(lineas),
+            criterio_fuerza=self._BATCH_CRITERIO_FUERZA if con_fuerza else ""
+        )
+        
+        respuestas = {}
+        try:
+            ids = {str(relacion[0]) for relacion in relaciones}
+            codigo, texto = self._generar(prompt, len(relaciones),
+                                          completo=lambda texto: self._lote_completo(texto, ids))
+            if codigo == 200:
+                # Se recorta en lugar de usar pos: "^" no coincide tras "</think>" en la misma línea
+                for m in _RE_RESPUESTA_LOTE.finditer(texto[_inicio_respuesta(texto):]):
+                    respuestas[m.group(1)] = (m.group(2)[:3].casefold() == "inv", m.group(3))
+            else:
+                self.logger.error("Error en API para el lote de %d relaciones: %s", len(relaciones), codigo)
+        except Exception as e:
+            self.logger.error("Excepción al procesar el lote de %d relaciones: %s", len(relaciones), e)
+        
+        # Una respuesta incompleta suele deberse a líneas omitidas por el modelo: pedir las que
+        # faltan en un solo prompt evita una petición por relación
+        faltan = [relacion for relacion in relaciones if str(relacion[0]) not in respuestas]
+        recuperados = {}
+        if reintentar and respuestas and len(faltan) > 1:
+            recuperados = {str(relacion[0]): resultado for relacion, resultado in
+                           zip(faltan, self._consultar_modelo_lote(faltan, reintentar=False))}
+        
+        resultados = []
+        for relacion in relaciones:
+            id_relacion, entidad1, tipo_relacion, entidad2, _ = relacion
+            respuesta = respuestas.get(str(id_relacion))
+            if respuesta is None:
+                resultado = recuperados.get(str(id_relacion))
+                resultados.append(resultado if resultado is not None else self._consultar_modelo(*relacion))
+                continue
+            es_invalido, justificacion = respuesta
+            validez = "inválido" if es_invalido else "válido"
+            resultados.append({
+                "id": id_relacion,
+                "entidad1": entidad1,
+                "relacion": tipo_relacion,
+                "entidad2": entidad2,
+                "validez": validez,
+                "justificacion": (justificacion or "").strip() if validez == "inválido" else ""
+            })
+        return resultados
+    
+    def _consultar_modelo(self, id_relacion, entidad1, tipo_relacion, entidad2, fuerza_relacion=None):
+        if fuerza_relacion is not None:
+            prompt = self._PROMPT_FUERZA_TMPL.format(id=id_relacion, e1=entidad1, rel=tipo_relacion,
+                                                     e2=entidad2, fuerza=fuerza_relacion)
         else:
-            prompt = f"""
-            Como sistema experto en medicina, evalúa si esta relación es médicamente válida:
-            
-            ID: {id_relacion}
-            Entidad 1: {entidad1}
-            Relación: {tipo_relacion}
-            Entidad 2: {entidad2}
-            
-            Si "{entidad1}" implica "{entidad2}" es médicamente correcto, responde solamente "VÁLIDO".
-            Si NO es correcto, responde "INVÁLIDO" y explica brevemente por qué.
-            
-            Basa tu respuesta únicamente en conocimiento médico establecido.
-            """
+            prompt = self._PROMPT_TMPL.format(id=id_relacion, e1=entidad1, rel=tipo_relacion, e2=entidad2)
         
         try:
-            time.sleep(0.5)
-            response = requests.post(
-                f"{self.host}/api/generate",
-                json={
-                    "model": self.modelo,
-                    "prompt": prompt,
-                    "stream": False,
-                    "temperature": 0.1
-                }
-            )
-            if response.status_code == 200:
-                respuesta = response.json()["response"]
-                if "VÁLIDO" in respuesta.upper() and "INVÁLIDO" not in respuesta.upper():
-                    validez = "válido"
-                    justificacion = ""
-                else:
-                    validez = "inválido"
-                    partes = respuesta.upper().split("INVÁLIDO", 1)
-                    justificacion = partes[1].strip() if len(partes) > 1 else respuesta
+            codigo, texto = self._generar(prompt, completo=self._respuesta_completa)
+            if codigo == 200:
+                validez, justificacion = self._interpretar_respuesta(texto)
                 return {
                     "id": id_relacion,
                     "entidad1": entidad1,
@@ -105,27 +568,177 @@ class VerificadorRelaciones:
                     "justificacion": justificacion if validez == "inválido" else ""
                 }
             else:
-                print(f"❌ Error en API para ID {id_relacion}: {response.status_code}")
-                return {"id": id_relacion, "validez": "error", "justificacion": f"Error API: {response.status_code}"}
+                self.logger.error("Error en API para ID %s: %s", id_relacion, codigo)
+                return {"id": id_relacion, "validez": "error", "justificacion": f"Error API: {codigo}"}
         except Exception as e:
-            print(f"❌ Excepción al procesar ID {id_relacion}: {str(e)}")
+            self.logger.error("Excepción al procesar ID %s: %s", id_relacion, e)
             return {"id": id_relacion, "validez": "error", "justificacion": f"Error: {str(e)}"}
 
-    def procesar_datos(self, datos):
+    @staticmethod
+    def _respuesta_completa(texto):
+        """
+        Indica si la respuesta en streaming a un prompt individual ya contiene el veredicto
+        en una línea terminada y, si es "INVÁLIDO", una línea de justificación
+        """
+        if _razonando(texto):
+            return False
+        m = _RE_VEREDICTO.search(texto, _inicio_respuesta(texto))
+        if m is None:
+            return False
+        resto = texto[m.end():]
+        if not m.group(1):
+            return "\n" in resto
+        # La justificación puede ir en la misma línea o en la siguiente
+        lineas = resto.lstrip(" \t:").split("\n")[:-1]
+        return any(linea.strip() for linea in lineas)
+    
+    @staticmethod
+    def _lote_completo(texto, ids):
+        """
+        Indica si la respuesta en streaming a un prompt por lotes ya contiene una línea
+        terminada con el veredicto de cada uno de los ids
+        """
+        if _razonando(texto):
+            return False
+        terminado = texto[:texto.rfind("\n") + 1]
+        encontrados = {m.group(1) for m in _RE_RESPUESTA_LOTE.finditer(terminado[_inicio_respuesta(texto):])}
+        return ids <= encontrados
+    
+    @staticmethod
+    def _interpretar_respuesta(respuesta):
+        """
+        Obtiene el veredicto de la respuesta del modelo recorriéndola una sola vez.
+        El bloque de razonamiento (<think>...</think>) no se examina: puede mencionar
+        ambos veredictos antes de decidir. Basta un "INVÁLIDO" para que la relación sea
+        inválida; la justificación es el texto que le sigue. Sin ningún veredicto
+        reconocible también se considera inválida y se devuelve la respuesta completa.
+        
+        Returns:
+            tuple: (validez, justificacion)
+        """
+        valido = False
+        for m in _RE_VEREDICTO.finditer(respuesta, _inicio_respuesta(respuesta)):
+            if m.group(1):
+                resto = respuesta[m.end():].lstrip()
+                if resto.startswith(":"):
+                    resto = resto[1:]
+                return "inválido", resto.strip()
+            valido = True
+        if valido:
+            return "válido", ""
+        return "inválido", respuesta
+    
+    def procesar_datos(self, datos, sink=None):
         """
         Procesa los datos y utiliza la información del checkpoint para evitar reprocesar relaciones.
         Se detecta de forma automática el nombre de la columna de identificación y el campo del elemento relacionado,
         en función del formato del DataFrame (nuevos datos TXT con 7 columnas o formato original de 4 columnas).
 
         Args:
-            datos (DataFrame o lista): Los datos a procesar.
+            datos (DataFrame, lista o iterable de DataFrames): Los datos a procesar. Los chunks
+                (por ejemplo, los que genera DataLoader para TXT) se procesan a medida que se
+                leen, sin unirlos en memoria; max_procesar se aplica al total de los chunks.
+            sink (opcional): Destino con método write(resultado) (por ejemplo un ResultSink)
+                que recibe cada relación inválida o con error en cuanto se obtiene; si se
+                indica, los resultados no se acumulan en la lista devuelta.
 
         Returns:
             tuple: (resultados, total_relaciones_procesadas)
         """
-        if not isinstance(datos, pd.DataFrame):
-            datos = pd.DataFrame(datos)
+        if isinstance(datos, pd.DataFrame):
+            chunks = [datos]
+        elif isinstance(datos, dict) or (isinstance(datos, list) and not
+                                         (datos and isinstance(datos[0], pd.DataFrame))):
+            chunks = [pd.DataFrame(datos)]
+        else:
+            chunks = datos
+        
+        resultados = []
+        registrar = sink.write if sink is not None else resultados.append
+        total = 0
+        
+        # Un hilo lee y prepara los lotes siguientes mientras se espera la respuesta de Ollama
+        cola = queue.Queue(maxsize=2)
+        productor = threading.Thread(target=self._preparar_lotes, args=(chunks, cola), daemon=True)
+        productor.start()
+        
+        # Las peticiones de cada lote se envían en paralelo (hasta `concurrencia` a la vez por servidor).
+        # El lote siguiente se envía antes de recoger el anterior, de modo que los hilos no quedan
+        # ociosos esperando a la última petición de un lote; los lotes se registran en orden.
+        en_vuelo = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrencia * len(self.hosts)) as executor:
+            while True:
+                lote = cola.get()
+                if lote is None:
+                    break
+                if isinstance(lote, Exception):
+                    raise lote
+                en_vuelo.append(self._enviar_lote(executor, *lote))
+                if len(en_vuelo) > 1:
+                    total += self._registrar_lote(*en_vuelo.popleft(), registrar)
+                    self.logger.info("Procesadas %d relaciones", total)
+            while en_vuelo:
+                total += self._registrar_lote(*en_vuelo.popleft(), registrar)
+                self.logger.info("Procesadas %d relaciones", total)
+        
+        productor.join()
+        self.checkpoint_manager.flush()
+        self.guardar_cache()
+        
+        if total == 0:
+            self.logger.info("No hay nuevas relaciones para procesar")
+        return resultados, total
+    
+    def _enviar_lote(self, executor, lote, claves):
+        """
+        Envía al executor las verificaciones de un lote sin esperar sus respuestas
+
+        Returns:
+            tuple: (lote, claves, unicas, tareas) para pasar a _registrar_lote
+        """
+        # Las relaciones repetidas en el lote (misma clave de caché) se verifican una sola vez
+        unicas = {}
+        for clave, args in zip(claves, lote):
+            unicas.setdefault(clave, args)
+        representantes = list(unicas.values())
+        claves_unicas = list(unicas)
+        
+        # Cada tarea evalúa hasta micro_batch relaciones en un mismo prompt
+        tareas = [executor.submit(self.verificar_relaciones, representantes[j:j + self.micro_batch],
+                                  claves_unicas[j:j + self.micro_batch])
+                  for j in range(0, len(representantes), self.micro_batch)]
+        return lote, claves, unicas, tareas
+    
+    def _registrar_lote(self, lote, claves, unicas, tareas, registrar):
+        """
+        Espera las respuestas de un lote enviado, registra los resultados inválidos o con error
+        y marca el lote en el checkpoint
+
+        Returns:
+            int: Número de relaciones del lote
+        """
+        por_clave = dict(zip(unicas, (resultado for tarea in tareas for resultado in tarea.result())))
+        
+        for clave, args in zip(claves, lote):
+            resultado = por_clave[clave]
+            if args is not unicas[clave]:
+                resultado = self._copiar_resultado(resultado, args)
+            if resultado["validez"] in ["inválido", "error"]:
+                registrar(resultado)
+        
+        # El lote completo se registra en el checkpoint con una sola escritura al WAL
+        self.checkpoint_manager.agregar_ids_procesados([args[0] for args in lote])
+        self.guardar_cache(forzar=False)
+        return len(lote)
+    
+    @staticmethod
+    def _detectar_columnas(datos):
+        """
+        Detecta las columnas de identificador y de elemento relacionado, y si hay fuerza de relación.
         
+        Returns:
+            tuple: (id_col, elem_col, tiene_fuerza)
+        """
         # Detectar de forma automática el nombre de la columna para el identificador.
         # Para el formato original se esperará "ID", de lo contrario se usa "Linea" (para el TXT).
         id_col = "ID" if "ID" in datos.columns else ("Linea" if "Linea" in datos.columns else None)
@@ -147,51 +760,173 @@ class VerificadorRelaciones:
         
         # Detectar si se está trabajando con el formato TXT (donde también se espera 'fuerza_relacion')
         tiene_fuerza = "fuerza_relacion" in datos.columns
-
-        ids_procesados = set(self.checkpoint_manager.checkpoint.get("ids_procesados", []))
-        datos_filtrados = datos[~datos[id_col].astype(str).isin(ids_procesados)]
+        return id_col, elem_col, tiene_fuerza
+    
+    def _filtrar_chunks(self, chunks):
+        """
+        Descarta de cada chunk las relaciones ya procesadas y aplica max_procesar al total.
+        Al alcanzar el límite deja de leer chunks.
+        
+        Las columnas se detectan una vez por cada conjunto de columnas distinto (no en
+        cada chunk) y cada chunk filtrado conserva solo las columnas usadas, con los
+        nombres de _COLUMNAS_CANONICAS.
+        
+        Yields:
+            tuple: (datos_filtrados, tiene_fuerza)
+        """
+        restantes = self.max_procesar or None
+        columnas_detectadas = None
+        for datos in chunks:
+            # Un chunk vacío (p. ej. un TXT cuyas líneas ya están todas procesadas) puede no tener columnas
+            if datos.empty:
+                continue
+            if columnas_detectadas is None or not datos.columns.equals(columnas_detectadas):
+                id_col, elem_col, tiene_fuerza = self._detectar_columnas(datos)
+                origen = [id_col, "Entidad", "Relación", elem_col] + (["fuerza_relacion"] if tiene_fuerza else [])
+                columnas_detectadas = datos.columns
+            if restantes is None:
+                pendientes = np.flatnonzero(~self._mascara_procesados(datos[id_col]))
+            else:
+                pendientes, limitado = self._primeros_pendientes(datos[id_col], restantes)
+                if limitado:
+                    self.logger.info("Limitando a %d relaciones por ejecución", self.max_procesar)
+            # Una sola copia, con las filas pendientes y solo las columnas necesarias
+            datos_filtrados = datos.iloc[pendientes, datos.columns.get_indexer(origen)]
+            datos_filtrados.columns = _COLUMNAS_CANONICAS[:len(origen)]
+            
+            if len(datos_filtrados):
+                self.logger.info("Procesando %d relaciones...", len(datos_filtrados))
+                yield datos_filtrados, tiene_fuerza
+            
+            if restantes is not None:
+                restantes -= len(datos_filtrados)
+                if restantes <= 0:
+                    break
+    
+    def _primeros_pendientes(self, ids, cantidad):
+        """
+        Busca las posiciones de los primeros `cantidad` ids no procesados revisando la
+        columna por ventanas crecientes, de modo que con un max_procesar pequeño no se
+        compara la columna entera contra el checkpoint.
         
-        if self.max_procesar and len(datos_filtrados) > self.max_procesar:
-            print(f"ℹ️ Limitando a {self.max_procesar} relaciones por ejecución")
-            datos_filtrados = datos_filtrados.head(self.max_procesar)
+        Returns:
+            tuple: (posiciones, limitado). limitado es True si el límite dejó fuera
+            filas del chunk sin revisar o pendientes.
+        """
+        encontradas = []
+        faltan = cantidad
+        inicio = 0
+        ventana = max(2 * cantidad, 1024)
+        while faltan > 0 and inicio < len(ids):
+            fin = inicio + ventana
+            pendientes = np.flatnonzero(~self._mascara_procesados(ids.iloc[inicio:fin])) + inicio
+            if len(pendientes) > faltan:
+                encontradas.append(pendientes[:faltan])
+                return np.concatenate(encontradas), True
+            encontradas.append(pendientes)
+            faltan -= len(pendientes)
+            inicio = fin
+            ventana *= 2
+        posiciones = np.concatenate(encontradas) if encontradas else np.empty(0, dtype=np.intp)
+        return posiciones, faltan <= 0 and inicio < len(ids)
+    
+    def _mascara_procesados(self, ids):
+        """
+        Indica qué ids ya están en el checkpoint.
         
-        if len(datos_filtrados) == 0:
-            print("ℹ️ No hay nuevas relaciones para procesar")
-            return [], 0
+        Los ids enteros en forma canónica se comparan como int64 contra los rangos
+        del checkpoint (búsqueda binaria vectorizada) y los demás con un isin contra
+        el conjunto de ids no numéricos; solo los enteros que no caben en int64 se
+        consultan uno a uno con es_procesado. Con el checkpoint vacío no se convierte nada.
         
-        print(f"🔍 Procesando {len(datos_filtrados)} relaciones...")
-        resultados = []
-        nuevos_ids_procesados = list(ids_procesados)
-        
-        for i in range(0, len(datos_filtrados), self.batch_size):
-            lote = datos_filtrados.iloc[i:i+self.batch_size]
-            for _, fila in lote.iterrows():
-                id_rel = str(fila[id_col])
-                entidad = fila["Entidad"]
-                relacion = fila["Relación"]
-                elemento = fila[elem_col]
-                print(f"📊 Verificando: {id_rel} - {entidad} -> {elemento}")
-                
-                # Si es formato TXT, se utiliza la fuerza de relación al verificar la relación
-                if tiene_fuerza:
-                    fuerza = fila["fuerza_relacion"]
-                    resultado = self.verificar_relacion(id_rel, entidad, relacion, elemento, fuerza)
-                else:
-                    resultado = self.verificar_relacion(id_rel, entidad, relacion, elemento)
-                
-                if resultado["validez"] in ["inválido", "error"]:
-                    resultados.append(resultado)
-                
-                nuevos_ids_procesados.append(id_rel)
-                
-                if len(nuevos_ids_procesados) % 10 == 0:
-                    self.checkpoint_manager.update_checkpoint(id_rel, nuevos_ids_procesados)
-        
-        if datos_filtrados.shape[0] > 0:
-            ultimo_id = str(datos_filtrados.iloc[-1][id_col])
-            self.checkpoint_manager.update_checkpoint(ultimo_id, nuevos_ids_procesados)
-        
-        return resultados, len(datos_filtrados)
+        Args:
+            ids (Series): Columna de identificadores.
+        
+        Returns:
+            ndarray: Máscara booleana, True para los ids ya procesados.
+        """
+        # Copia tomada bajo el lock: el hilo principal agrega ids mientras se filtra
+        rangos, otros = self.checkpoint_manager.obtener_copia_procesados()
+        if not rangos and not otros:
+            return np.zeros(len(ids), dtype=bool)
+        
+        try:
+            if pd.api.types.is_integer_dtype(ids) and not ids.hasnans:
+                numeros = ids.to_numpy(dtype=np.int64)
+                canonicos = numeros >= 0
+            else:
+                texto = ids.astype(str)
+                # Hasta 18 dígitos ASCII (\d admite otros sistemas) para que el valor quepa en int64
+                canonicos = texto.str.fullmatch(r"0|[1-9][0-9]{0,17}").to_numpy(dtype=bool)
+                numeros = pd.to_numeric(texto.where(canonicos, "0")).to_numpy(dtype=np.int64)
+            
+            rangos = np.array(rangos, dtype=np.int64).reshape(-1, 2)
+        except (OverflowError, ValueError):
+            return ids.astype(str).map(self.checkpoint_manager.es_procesado).to_numpy(dtype=bool)
+        
+        mascara = np.zeros(len(ids), dtype=bool)
+        if len(rangos):
+            posiciones = np.searchsorted(rangos[:, 0], numeros, side="right") - 1
+            mascara = canonicos & (posiciones >= 0) & (rangos[np.maximum(posiciones, 0), 1] >= numeros)
+        
+        resto = ~canonicos
+        if resto.any():
+            texto_resto = ids[resto].astype(str)
+            en_resto = texto_resto.isin(otros).to_numpy(dtype=bool, copy=True)
+            # Los enteros de más de 18 dígitos no caben en int64 pero se guardan en los rangos
+            largos = texto_resto.str.fullmatch(r"[0-9]+").to_numpy(dtype=bool)
+            if largos.any():
+                en_resto[largos] = texto_resto[largos].map(self.checkpoint_manager.es_procesado).to_numpy(dtype=bool)
+            mascara[resto] = en_resto
+        return mascara
+    
+    @staticmethod
+    def _filas(datos, tiene_fuerza):
+        """
+        Devuelve un iterador de pares (argumentos de verificar_relacion, clave de caché).
+        Se recorren las columnas como listas en lugar de construir una Series por fila:
+        tolist() convierte cada columna de una vez a escalares de Python (más rápidos de
+        recorrer que los de numpy y serializables tal cual en los resultados). Las claves
+        se normalizan por columnas con las operaciones vectorizadas de pandas.
+        """
+        columnas = [
+            datos["id"].astype(str).tolist(),
+            datos["entidad1"].tolist(),
+            datos["relacion"].tolist(),
+            datos["entidad2"].tolist(),
+        ]
+        claves = [VerificadorRelaciones._normalizar_columna(datos[col]) for col in ("entidad1", "relacion", "entidad2")]
+        # Si es formato TXT, se utiliza la fuerza de relación al verificar la relación
+        if tiene_fuerza:
+            columnas.append(datos["fuerza"].tolist())
+            claves.append([VerificadorRelaciones._clave_fuerza(fuerza) for fuerza in columnas[-1]])
+        else:
+            claves.append(repeat(None, len(datos)))
+        return zip(zip(*columnas), zip(*claves))
+    
+    def _preparar_lotes(self, chunks, cola):
+        """
+        Productor de procesar_datos: lee los chunks, descarta lo ya procesado y
+        coloca en la cola, para cada lote de batch_size relaciones, la lista de argumentos
+        de verificar_relacion y la de sus claves de caché. Al terminar coloca None; si falla, coloca la excepción.
+        """
+        # Se evalúa una vez: el detalle por relación solo se genera en nivel DEBUG
+        detalle = self.logger.isEnabledFor(logging.DEBUG)
+        try:
+            filas = chain.from_iterable(self._filas(*chunk) for chunk in self._filtrar_chunks(chunks))
+            
+            while True:
+                pares = list(islice(filas, self.batch_size))
+                if not pares:
+                    break
+                argumentos = [args for args, _ in pares]
+                if detalle:
+                    for id_rel, entidad, _, elemento, *_ in argumentos:
+                        self.logger.debug("Verificando: %s - %s -> %s", id_rel, entidad, elemento)
+                cola.put((argumentos, [clave for _, clave in pares]))
+            cola.put(None)
+        except Exception as e:
+            cola.put(e)
     
     def generar_reporte(self, relaciones_invalidas, total_procesado):
         """
@@ -211,27 +946,32 @@ class VerificadorRelaciones:
             print("-" * 50)
         
         # Guardar reporte en archivo
-        with open(f"reporte_relaciones_invalidas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", 'w', encoding='utf-8') as f:
-            json.dump(relaciones_invalidas, f, ensure_ascii=False, indent=2)
+        guardar_json(relaciones_invalidas, f"reporte_relaciones_invalidas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                     indentar=self.config.get("reporte_indentado", False))
 
 
 # Función para cargar datos desde diferentes formatos
 def cargar_datos(ruta_o_datos):
-    """Carga datos desde CSV, JSON o DataFrame"""
+    """
+    Carga datos desde CSV, JSON o DataFrame. Los CSV se leen con DataLoader (pyarrow y
+    columnas de texto respaldadas por Arrow si está instalado; por chunks si son grandes)
+    """
     if isinstance(ruta_o_datos, pd.DataFrame):
         return ruta_o_datos
     elif isinstance(ruta_o_datos, list):
         return pd.DataFrame(ruta_o_datos)
     elif isinstance(ruta_o_datos, str):
         if ruta_o_datos.endswith('.csv'):
-            return pd.read_csv(ruta_o_datos)
+            # Se importa aquí: gestion_de_datos configura el logging al importarse
+            from gestion_de_datos import DataLoader
+            return DataLoader(ruta_o_datos).load_csv_or_excel()
         elif ruta_o_datos.endswith('.json'):
-            with open(ruta_o_datos, 'r', encoding='utf-8') as f:
-                return pd.DataFrame(json.load(f))
+            return pd.DataFrame(cargar_json(ruta_o_datos))
     raise ValueError("Formato de datos no soportado")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     # Inicializar el verificador con la configuración
     verificador = VerificadorRelaciones()
 
@@ -0,0 +1,154 @@
+import json
+import os
+from collections import deque
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; si no está se usa json
+    orjson = None
+
+
+def cargar_json(ruta):
+    """
+    Lee un archivo JSON, con orjson si está disponible
+
+    Args:
+        ruta: Ruta del archivo
+
+    Returns:
+        El contenido del archivo como objetos de Python
+    """
+    if orjson is not None:
+        with open(ruta, "rb") as archivo:
+            return orjson.loads(archivo.read())
+    with open(ruta, "r", encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def serializar_json(datos, indentar=False):
+    """
+    Convierte datos a texto JSON (sin escapar acentos), con orjson si está disponible
+    """
+    if orjson is not None:
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indentar:
+            opciones |= orjson.OPT_INDENT_2
+        return orjson.dumps(datos, option=opciones).decode("utf-8")
+    return json.dumps(datos, ensure_ascii=False, indent=2 if indentar else None)
+
+
+def deserializar_json(texto):
+    """
+    Convierte texto JSON (str o bytes) a objetos de Python, con orjson si está disponible
+    """
+    if orjson is not None:
+        return orjson.loads(texto)
+    return json.loads(texto)
+
+
+def guardar_json(datos, ruta, indentar=True, sincronizar=False):
+    """
+    Escribe datos en un archivo JSON en UTF-8 (sin escapar acentos), con orjson si está disponible
+
+    Args:
+        datos: Objeto a serializar
+        ruta: Ruta del archivo
+        indentar: Si se indenta la salida con 2 espacios
+        sincronizar: Si se fuerza la escritura a disco (fsync) antes de cerrar el archivo,
+            necesario para que un os.replace posterior sea seguro ante cortes de energía
+    """
+    if orjson is not None:
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indentar:
+            opciones |= orjson.OPT_INDENT_2
+        with open(ruta, "wb") as archivo:
+            archivo.write(orjson.dumps(datos, option=opciones))
+            if sincronizar:
+                archivo.flush()
+                os.fsync(archivo.fileno())
+        return
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2 if indentar else None)
+        if sincronizar:
+            archivo.flush()
+            os.fsync(archivo.fileno())
+
+
+class ResultSink:
+    """
+    Escribe resultados a medida que llegan, un objeto JSON por línea (NDJSON), sin
+    mantenerlos en memoria. Al cerrarse puede convertir el archivo en una lista JSON
+    (indentada o compacta); si no se escribió ningún resultado, el archivo se elimina.
+
+    Uso:
+        with ResultSink("resultados.ndjson", ruta_json="resultados.json") as sink:
+            sink.write({"id": "1", "validez": "inválido"})
+    """
+
+    def __init__(self, ruta, ruta_json=None, vista_previa=5, indentar=True):
+        """
+        Args:
+            ruta: Archivo NDJSON donde se escriben los resultados
+            ruta_json: Archivo JSON final, o función que recibe el total de resultados
+                y devuelve su ruta. Si es None se conserva el NDJSON
+            vista_previa: Cantidad de últimos resultados que se mantienen en memoria
+            indentar: Si el JSON final se indenta; compacto, las líneas del NDJSON se
+                copian tal cual sin volver a serializarlas
+        """
+        self.ruta = ruta
+        self.ruta_json = ruta_json
+        self.indentar = indentar
+        self.ruta_final = None
+        self.total = 0
+        self.ultimos = deque(maxlen=vista_previa)
+        self._archivo = open(ruta, "w", encoding="utf-8")
+
+    def write(self, resultado):
+        """
+        Agrega un resultado al final del archivo y lo deja visible en disco de inmediato
+        """
+        self._archivo.write(serializar_json(resultado) + "\n")
+        self._archivo.flush()
+        self.total += 1
+        self.ultimos.append(resultado)
+
+    def close(self):
+        """
+        Cierra el archivo y, si corresponde, lo convierte a una lista JSON
+
+        Returns:
+            La ruta del archivo final, o None si no hubo resultados
+        """
+        if self._archivo is None:
+            return self.ruta_final
+        self._archivo.close()
+        self._archivo = None
+        if not self.total:
+            os.remove(self.ruta)
+            return None
+        if self.ruta_json is None:
+            self.ruta_final = self.ruta
+            return self.ruta_final
+
+        ruta_json = self.ruta_json(self.total) if callable(self.ruta_json) else self.ruta_json
+        # La conversión se hace registro a registro para no cargar el archivo completo
+        with open(self.ruta, "r", encoding="utf-8") as origen, \
+                open(ruta_json, "w", encoding="utf-8") as destino:
+            destino.write("[")
+            for n, linea in enumerate(origen):
+                if self.indentar:
+                    registro = serializar_json(deserializar_json(linea), indentar=True).replace("\n", "\n  ")
+                else:
+                    registro = linea.rstrip("\n")
+                destino.write((",\n  " if n else "\n  ") + registro)
+            destino.write("\n]")
+        os.remove(self.ruta)
+        self.ruta_final = ruta_json
+        return self.ruta_final
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,73 @@
+import pandas as pd
+
+from gestion_de_datos import DataLoader, _COLUMNS_EXT
+
+
+def test_csv_por_chunks_con_cambio_de_tipo_tardio(tmp_path):
+    """Un id no numérico al final del CSV no interrumpe la lectura por chunks"""
+    ids = [str(i) for i in range(3000)]
+    ids[2900] = "X9"
+    ruta = tmp_path / "datos.csv"
+    ruta.write_text("ID,Entidad,Relación,Elemento Relacionado\n"
+                    + "".join(f"{i},e{i},r,b{i}\n" for i in ids), encoding="utf-8")
+
+    chunks = list(DataLoader(str(ruta), chunk_size=20)._read_csv_chunks())
+
+    assert {len(chunk) for chunk in chunks} == {20}
+    assert [str(i) for chunk in chunks for i in chunk["ID"]] == ids
+
+
+def _csv_con_cambio_de_tipo_tardio(ruta, n=25000):
+    """Escribe un CSV cuyos ids son numéricos salvo uno cerca del final; devuelve los ids"""
+    ids = [str(i) for i in range(n)]
+    ids[n - 100] = "X9"
+    ruta.write_text("ID,Entidad,Relación,Elemento Relacionado\n"
+                    + "".join(f"{i},e{i},r,b{i}\n" for i in ids), encoding="utf-8")
+    return ids
+
+
+def _bloques_pequenos(monkeypatch):
+    """Reduce el bloque de pyarrow para que la inferencia de tipos no vea todo el archivo"""
+    original = DataLoader._arrow_read_options
+
+    def read_options(self):
+        opciones = original(self)
+        opciones.block_size = 4096
+        return opciones
+    monkeypatch.setattr(DataLoader, "_arrow_read_options", read_options)
+
+
+def test_main_carga_csv_grande_con_cambio_de_tipo_tardio(tmp_path, monkeypatch):
+    import main
+    _bloques_pequenos(monkeypatch)
+    ids = _csv_con_cambio_de_tipo_tardio(tmp_path / "datos.csv")
+
+    chunks = main.cargar_datos(str(tmp_path / "datos.csv"))
+
+    assert [str(i) for chunk in chunks for i in chunk["ID"]] == ids
+
+
+def test_verificador_carga_csv_grande_con_cambio_de_tipo_tardio(tmp_path, monkeypatch):
+    import procesamiento_datoss
+    _bloques_pequenos(monkeypatch)
+    ids = _csv_con_cambio_de_tipo_tardio(tmp_path / "datos.csv")
+
+    chunks = procesamiento_datoss.cargar_datos(str(tmp_path / "datos.csv"))
+
+    assert [str(i) for chunk in chunks for i in chunk["ID"]] == ids
+
+
+def test_parse_column_con_formatos_mezclados():
+    """Las filas en formato original de una columna con ambos formatos no se pierden"""
+    columna = pd.Series([
+        "167: (11 (Alergia alimentaria), Disease is in the domain of Specialty, 98 (Alergología)) 1.000000,",
+        "44310: (Tumores neuroendocrinos (TNEG) y de páncreas,Group can be observed in Anatomy,Páncreas)",
+    ])
+
+    parsed = DataLoader._parse_column(DataLoader.__new__(DataLoader), columna)
+
+    assert list(parsed.columns) == _COLUMNS_EXT
+    assert parsed.loc[0, ["Linea", "Codigo1", "Entidad", "Score"]].tolist() == ["167", "11", "Alergia alimentaria", "1.000000"]
+    assert parsed.loc[1, ["Linea", "Entidad", "Relación", "ElementoRelacionado"]].tolist() == [
+        "44310", "Tumores neuroendocrinos (TNEG) y de páncreas", "Group can be observed in Anatomy", "Páncreas"]
+    assert parsed.loc[1, ["Codigo1", "Codigo2", "Score"]].isna().all()
@@ -0,0 +1,28 @@
+import pandas as pd
+
+import main
+import procesamiento_datoss
+from checkpoint import GestionCheckpoint
+
+
+def _escribir_txt(ruta, n):
+    lineas = [f"{i}: (11 (Alergia alimentaria), Disease is in the domain of Specialty, {i} (Alergología)) 1.000000,"
+              for i in range(1, n + 1)]
+    ruta.write_text("\n".join(lineas) + "\n", encoding="utf-8")
+
+
+def test_reanudar_txt_completamente_procesado(tmp_path, monkeypatch):
+    """Si todas las líneas del TXT ya están en el checkpoint, la ejecución termina sin errores"""
+    monkeypatch.setattr(procesamiento_datoss.VerificadorRelaciones, "_verificar_modelo", lambda self: None)
+    ruta_txt = tmp_path / "d.txt"
+    _escribir_txt(ruta_txt, 40)
+    checkpoint = GestionCheckpoint(str(tmp_path / "checkpoint.json"))
+    checkpoint.agregar_ids_procesados(str(i) for i in range(1, 41))
+
+    datos = main.cargar_datos(str(ruta_txt), processed_ids=checkpoint)
+    assert isinstance(datos, pd.DataFrame) and datos.empty
+
+    config = {"ruta_checkpoint": str(tmp_path / "checkpoint.json"), "ruta_cache": str(tmp_path / "cache.json")}
+    verificador = procesamiento_datoss.VerificadorRelaciones(config, checkpoint)
+    resultados, total = verificador.procesar_datos(datos)
+    assert (resultados, total) == ([], 0)